@@ -1,36 +1,95 @@
 """
 FastAPI 백엔드 구현
 """
-from fastapi import FastAPI, UploadFile, File, Depends, HTTPException, Body
-from fastapi.responses import JSONResponse, FileResponse, HTMLResponse
+from fastapi import FastAPI, UploadFile, File, Depends, HTTPException, Body, Query, Request
+from fastapi.responses import JSONResponse, FileResponse, HTMLResponse, StreamingResponse, ORJSONResponse, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
+from fastapi.middleware.gzip import GZipMiddleware
+from sqlalchemy import select, delete
 from sqlalchemy.orm import Session
-import pandas as pd
+from sqlalchemy.ext.asyncio import AsyncSession
+import asyncio
 import csv
-import io
-from typing import List, Optional
+import logging
+import time
+from contextlib import asynccontextmanager
+from datetime import date
+from typing import Dict, List, Optional, Tuple, Union
 from models import (
-    Course, Schedule, TimetableVersion, ScheduleHistory, init_db, get_db,
+    Course, Schedule, TimetableVersion, ScheduleRecord, SessionLocal, init_db, get_async_db,
+    Partition, DEFAULT_TENANT, DEFAULT_SEMESTER,
     TimetableResponse, VacancyResponse, CourseResponse,
-    VersionResponse, VersionInfo, CourseAddRequest, CourseListResponse, CourseInfo
+    VersionResponse, VersionInfo, CourseAddRequest, CourseListResponse, CourseInfo,
+    CourseBatchRequest, RescheduleStatusResponse, WhatIfRequest, VersionTagRequest, FreeRoomResponse
 )
 from scheduler import TimetableScheduler
-from vacancy_analyzer import VacancyAnalyzer
+from course_ingest import IngestReport, ingest_courses
+from build_cache import assignment_rows, build_cache_key, get_cached_assignments, store_cached_assignments
+from vacancy_analyzer import analyze_schedules
+from version_history import (
+    record_from_row, get_next_version_number, save_version_history,
+    get_partition_version_async, get_active_version_id_async,
+    list_versions_page_async, reconstruct_version_async, get_version_vacancy_async
+)
+from response_cache import cached_json_response, invalidate_response_cache
+from reschedule_queue import RescheduleCoordinator
+from timetable_export import EXPORT_FORMATS, export_filename, iter_export
+from columnar import COLUMNAR_MEDIA_TYPE, encode_timetable, wants_columnar
+from what_if import scenario_hash, simulate
+from free_rooms import FreeRoomIndex, cache_index, get_cached_index, get_room_capacities, parse_free_room_query
+from version_diff import diff_versions_async
+from metrics import (
+    CONTENT_TYPE as METRICS_CONTENT_TYPE, Gauge, MetricsMiddleware, record_compaction, record_ga_run, render_metrics
+)
+from sql_profiler import SQL_PROFILE_ENABLED, SqlProfilerMiddleware
+from retention import (
+    COMPACTION_INTERVAL_SECONDS, RetentionPolicy, list_partitions,
+    start_compaction, compact_partition, finish_compaction, get_last_compaction_report
+)
+
+logger = logging.getLogger(__name__)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """앱 시작 시 데이터베이스 스키마 마이그레이션 및 주기적 이력 정리 시작"""
+    init_db()
+    compaction_task = None
+    if COMPACTION_INTERVAL_SECONDS > 0:
+        compaction_task = asyncio.create_task(compaction_loop())
+    yield
+    if compaction_task is not None:
+        compaction_task.cancel()
+
+
+app = FastAPI(title="실습실 시간표 자동 배정 시스템", version="1.0.0", lifespan=lifespan)
 
-app = FastAPI(title="실습실 시간표 자동 배정 시스템", version="1.0.0")
+# 응답 압축 (1KB 이상)
+app.add_middleware(GZipMiddleware, minimum_size=1000)
+
+# 라우트별 요청 처리 시간 수집 (/metrics)
+app.add_middleware(MetricsMiddleware)
+
+# 요청별 SQL 수/시간 및 N+1 조회 보고 (디버그용, TIMETABLE_SQL_PROFILE=1)
+if SQL_PROFILE_ENABLED:
+    app.add_middleware(SqlProfilerMiddleware)
 
 # 정적 파일 서빙
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
-# 데이터베이스 초기화 (앱 시작 시)
-init_db()
-
 # 상수 정의
 ROOMS = ["1215", "1216", "1217", "1418", "RENTAL_1"]
 DAYS = ["월", "화", "수", "목", "금"]
 HOURS = ["09:00", "10:00", "11:00", "12:00", "13:00", "14:00", "15:00", "16:00", "17:00", "18:00"]
 
 
+def get_partition(
+    tenant: str = Query(DEFAULT_TENANT, min_length=1, max_length=64),
+    semester: str = Query(DEFAULT_SEMESTER, min_length=1, max_length=64)
+) -> Partition:
+    """요청 파티션 (tenant, semester 쿼리 파라미터, 생략 시 기본 파티션)"""
+    return Partition(tenant, semester)
+
+
 def get_timetable_metadata(version: Optional[int] = None, restored_from: Optional[int] = None) -> dict:
     """시간표 메타데이터 생성"""
     metadata = {
@@ -45,8 +104,16 @@ def get_timetable_metadata(version: Optional[int] = None, restored_from: Optiona
     return metadata
 
 
+# 시간표 응답에 필요한 Schedule 컬럼 (ORM 객체 대신 행 튜플로 조회)
+TIMETABLE_COLUMNS = (
+    Schedule.id, Schedule.course_code, Schedule.course_name, Schedule.instructor, Schedule.department,
+    Schedule.is_lab, Schedule.enrollment, Schedule.weeks, Schedule.credits,
+    Schedule.day, Schedule.start_time, Schedule.end_time, Schedule.room
+)
+
+
 def schedule_to_dict(schedule) -> dict:
-    """Schedule 객체를 딕셔너리로 변환"""
+    """Schedule 객체(또는 같은 속성을 가진 행)를 딕셔너리로 변환"""
     return {
         "courseCode": schedule.course_code,
         "courseName": schedule.course_name,
@@ -63,9 +130,89 @@ def schedule_to_dict(schedule) -> dict:
     }
 
 
-def create_schedule_from_assignment(assignment) -> Schedule:
-    """CourseAssignment로부터 Schedule 객체 생성"""
+def timetable_payload(timetable_list: List[dict], metadata: dict, next_cursor: Optional[int] = None) -> dict:
+    """
+    TimetableResponse와 같은 형태의 응답 딕셔너리 생성
+    
+    schedule_to_dict/to_dict로 만든 내부 데이터는 이미 모델 형식을 따르므로
+    Pydantic 검증을 거치지 않고 orjson으로 바로 직렬화합니다.
+    """
+    return {
+        "timetable": timetable_list,
+        "metadata": metadata,
+        "nextCursor": next_cursor
+    }
+
+
+def filter_schedules(
+    stmt,
+    partition: Partition,
+    room: Optional[str] = None,
+    day: Optional[str] = None,
+    instructor: Optional[str] = None,
+    department: Optional[str] = None,
+    is_lab: Optional[bool] = None
+):
+    """Schedule 조회문에 파티션과 강의실/요일/교수/학과/실습 여부 필터 적용"""
+    stmt = stmt.where(Schedule.in_partition(partition))
+    if room is not None:
+        stmt = stmt.where(Schedule.room == room)
+    if day is not None:
+        stmt = stmt.where(Schedule.day == day)
+    if instructor is not None:
+        stmt = stmt.where(Schedule.instructor == instructor)
+    if department is not None:
+        stmt = stmt.where(Schedule.department == department)
+    if is_lab is not None:
+        stmt = stmt.where(Schedule.is_lab == is_lab)
+    return stmt
+
+
+def stream_schedules(stmt, batch_size: int = 500):
+    """서버 측 커서로 Schedule 행을 배치 단위로 순회 (별도 세션 사용)"""
+    db = SessionLocal()
+    try:
+        result = db.execute(stmt.execution_options(yield_per=batch_size))
+        for schedule in result.scalars():
+            yield schedule
+    finally:
+        db.close()
+
+
+def export_response(fmt: str, schedules, start: Optional[date], version_number: Optional[int] = None) -> StreamingResponse:
+    """내보내기 스트리밍 응답 생성"""
+    media_type, _ = EXPORT_FORMATS[fmt]
+    filename = export_filename(fmt, version_number)
+    return StreamingResponse(
+        iter_export(fmt, schedules, start),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+def create_course_from_request(course_data: CourseAddRequest, partition: Partition) -> Course:
+    """강의 추가 요청으로부터 파티션의 Course 객체 생성"""
+    return Course(
+        **partition._asdict(),
+        process=course_data.process,
+        department=course_data.department,
+        course_code=course_data.course_code,
+        course_name=course_data.course_name,
+        grade=0,
+        area=course_data.area,
+        enrollment=course_data.enrollment,
+        main_instructor=course_data.main_instructor,
+        instructor=course_data.instructor,
+        weeks=course_data.weeks,
+        credits=course_data.credits,
+        is_lab=course_data.is_lab
+    )
+
+
+def create_schedule_from_assignment(assignment, partition: Partition) -> Schedule:
+    """CourseAssignment로부터 파티션의 Schedule 객체 생성"""
     return Schedule(
+        **partition._asdict(),
         course_id=assignment.course.id,
         course_code=assignment.course.course_code,
         course_name=assignment.course.course_name,
@@ -82,9 +229,10 @@ def create_schedule_from_assignment(assignment) -> Schedule:
     )
 
 
-def create_schedule_from_history(history: ScheduleHistory) -> Schedule:
-    """ScheduleHistory로부터 Schedule 객체 생성"""
+def create_schedule_from_history(history: ScheduleRecord, partition: Partition) -> Schedule:
+    """버전 이력 레코드로부터 파티션의 Schedule 객체 생성"""
     return Schedule(
+        **partition._asdict(),
         course_id=history.course_id,
         course_code=history.course_code,
         course_name=history.course_name,
@@ -101,384 +249,775 @@ def create_schedule_from_history(history: ScheduleHistory) -> Schedule:
     )
 
 
-def save_schedules_to_db(db: Session, assignments: List) -> None:
-    """할당 목록을 Schedule 테이블에 저장"""
-    db.query(Schedule).delete()
+def save_schedules_to_db(db: Session, partition: Partition, assignments: List) -> None:
+    """할당 목록을 파티션의 Schedule 테이블에 저장"""
+    db.query(Schedule).filter(Schedule.in_partition(partition)).delete()
     for assignment in assignments:
-        schedule = create_schedule_from_assignment(assignment)
+        schedule = create_schedule_from_assignment(assignment, partition)
         db.add(schedule)
     db.commit()
 
 
-def reschedule_all(db: Session, description: str = "") -> Tuple[List, int]:
-    """전체 시간표 재배정"""
-    # 버전 이력 저장
-    version_number = get_next_version_number(db)
-    save_version_history(db, version_number, description)
-    
-    # 활성 강의 조회 및 재배정
-    active_courses = db.query(Course).filter(Course.is_deleted == False).all()
-    scheduler = TimetableScheduler(active_courses)
+def get_active_courses(db: Session, partition: Partition) -> List[Course]:
+    """파티션의 활성 강의 (ID 순)"""
+    return db.query(Course).filter(
+        Course.in_partition(partition), Course.is_deleted == False
+    ).order_by(Course.id).all()
+
+
+def run_scheduler(courses: List[Course], seed: Optional[int] = None) -> Tuple[List, Optional[float]]:
+    """유전 알고리즘 실행 및 지표 기록 (배정 목록과 최고 적합도 반환)"""
+    scheduler = TimetableScheduler(courses, seed)
+    started = time.perf_counter()
     assignments = scheduler.schedule()
+    best = scheduler.best_chromosome
+    fitness = best.fitness if best else None
+    record_ga_run(time.perf_counter() - started, scheduler.generations_run, fitness, len(courses))
+    return assignments, fitness
+
+
+def save_assignments_as_version(
+    db: Session, partition: Partition, assignments: List, description: str = ""
+) -> Tuple[List[dict], int]:
+    """배정 목록을 파티션의 Schedule과 새 버전으로 저장 (응답용 배정 목록과 버전 번호 반환)"""
+    timetable_list = [assignment.to_dict() for assignment in assignments]  # 커밋으로 강의 객체가 만료되기 전에 변환
+    save_schedules_to_db(db, partition, assignments)
+    version_number = save_current_as_version(db, partition, description)
+    return timetable_list, version_number
+
+
+def reschedule_all(db: Session, partition: Partition, description: str = "") -> Tuple[List[dict], int]:
+    """파티션 전체 시간표 재배정 (응답용 배정 목록과 버전 번호 반환)"""
+    assignments, _ = run_scheduler(get_active_courses(db, partition))
+    return save_assignments_as_version(db, partition, assignments, description)
+
+
+def build_with_cache(
+    db: Session, partition: Partition, description: str, reoptimize: bool = False, seed: Optional[int] = None
+) -> Tuple[List[dict], int, Dict]:
+    """
+    CSV로 적재한 강의의 시간표 생성 (응답용 배정 목록, 버전 번호, 캐시 정보 반환)
+    
+    같은 강의 목록과 파라미터로 생성한 결과가 캐시에 있으면 유전 알고리즘을 건너뜁니다 (reoptimize이면 항상 실행).
+    """
+    active_courses = get_active_courses(db, partition)
+    key = build_cache_key(active_courses, seed)
+    assignments = None if reoptimize else get_cached_assignments(db, key, active_courses)
+    hit = assignments is not None
+    if not hit:
+        assignments, fitness = run_scheduler(active_courses, seed)
+        rows = assignment_rows(active_courses, assignments)  # 커밋으로 강의 객체가 만료되기 전에 변환
     
-    # Schedule 저장
-    save_schedules_to_db(db, assignments)
-    
-    return assignments, version_number
-
-
-def load_courses_from_csv(csv_content: str) -> List[Course]:
-    """CSV 내용을 Course 객체 리스트로 변환"""
-    df = pd.read_csv(io.StringIO(csv_content))
-    courses = []
-    
-    for _, row in df.iterrows():
-        course = Course(
-            process=row.get("과정", ""),
-            department=row.get("개설학과", ""),
-            course_code=row.get("교과목코드", ""),
-            course_name=row.get("교과목명", ""),
-            grade=int(row.get("개설학년", 0)) if pd.notna(row.get("개설학년")) else 0,
-            area=row.get("영역구분", ""),
-            enrollment=int(row.get("수강인원", 0)) if pd.notna(row.get("수강인원")) else 0,
-            main_instructor=row.get("강좌대표교수", ""),
-            instructor=row.get("강좌담당교수", ""),
-            weeks=int(row.get("수업주수", 0)) if pd.notna(row.get("수업주수")) else 0,
-            credits=int(row.get("교과목학점", 0)) if pd.notna(row.get("교과목학점")) else 0,
-            is_lab=row.get("강의유형구분", "") == "실습"
+    timetable_list, version_number = save_assignments_as_version(
+        db, partition, assignments, f"{description} (캐시)" if hit else description
+    )
+    if not hit:
+        store_cached_assignments(db, key, len(active_courses), rows, fitness)
+    return timetable_list, version_number, {"key": key, "hit": hit, "reoptimized": reoptimize, "seed": seed}
+
+
+def save_current_as_version(db: Session, partition: Partition, description: str = "") -> int:
+    """파티션의 현재 Schedule을 새 활성 버전으로 저장하고 해당 파티션의 응답 캐시 무효화"""
+    version_number = get_next_version_number(db, partition)
+    save_version_history(db, partition, version_number, description)
+    invalidate_response_cache(partition)
+    return version_number
+
+
+def run_partition_schedule(partition: Partition, description: str) -> Tuple[List[dict], int]:
+    """파티션 재배정 실행 (백그라운드 스레드, 독립 세션 사용)"""
+    db = SessionLocal()
+    try:
+        return reschedule_all(db, partition, description)
+    finally:
+        db.close()
+
+
+def run_partition_version_save(partition: Partition, description: str) -> int:
+    """파티션의 현재 Schedule을 새 버전으로 저장 (백그라운드 스레드, 독립 세션 사용)"""
+    db = SessionLocal()
+    try:
+        return save_current_as_version(db, partition, description)
+    finally:
+        db.close()
+
+
+def run_partition_build(
+    partition: Partition, description: str, reoptimize: bool, seed: Optional[int]
+) -> Tuple[List[dict], int, Dict]:
+    """CSV 시간표 생성 실행 (백그라운드 스레드, 독립 세션 사용)"""
+    db = SessionLocal()
+    try:
+        return build_with_cache(db, partition, description, reoptimize, seed)
+    finally:
+        db.close()
+
+
+def run_reschedule(partition: Partition, description: str) -> int:
+    """병합된 재배정 실행 (결과 버전 번호 반환)"""
+    _, version_number = run_partition_schedule(partition, description)
+    return version_number
+
+
+def replace_partition_courses(partition: Partition, source) -> IngestReport:
+    """파티션의 강의/시간표를 CSV 내용으로 교체 (백그라운드 스레드, 하나의 트랜잭션)"""
+    db = SessionLocal()
+    try:
+        db.query(Course).filter(Course.in_partition(partition)).delete()
+        db.query(Schedule).filter(Schedule.in_partition(partition)).delete()
+        try:
+            ingest_report = ingest_courses(db, source, partition)
+        except ValueError:
+            db.rollback()
+            raise
+        db.commit()
+        invalidate_response_cache(partition)
+        return ingest_report
+    finally:
+        db.close()
+
+
+# 파티션별 강의 변경 재배정 병합 실행기 (잠금으로 같은 파티션의 재배정/시간표 생성/이력 정리 직렬화)
+_reschedule_coordinators: Dict[Partition, RescheduleCoordinator] = {}
+
+
+def get_reschedule_coordinator(partition: Partition) -> RescheduleCoordinator:
+    """파티션의 재배정 병합 실행기 (없으면 생성)"""
+    coordinator = _reschedule_coordinators.get(partition)
+    if coordinator is None:
+        coordinator = RescheduleCoordinator(
+            lambda description: run_reschedule(partition, description)
         )
-        courses.append(course)
+        _reschedule_coordinators[partition] = coordinator
+    return coordinator
+
+
+# 재배정 대기열 지표 (/metrics 조회 시 계산)
+Gauge(
+    "timetable_reschedule_queue_depth", "파티션별 재배정 대기 중인 변경 수", ("tenant", "semester"),
+    collect=lambda: {partition: c.pending_count for partition, c in list(_reschedule_coordinators.items())}
+)
+Gauge(
+    "timetable_reschedule_running", "파티션별 재배정/시간표 생성/이력 정리 실행 여부", ("tenant", "semester"),
+    collect=lambda: {partition: int(c.lock.locked()) for partition, c in list(_reschedule_coordinators.items())}
+)
+
+
+async def run_compaction_job(policy: Optional[RetentionPolicy] = None, trigger: str = "manual"):
+    """
+    버전 이력 정리 실행 (파티션마다 해당 파티션의 재배정/시간표 생성과 직렬화, 정리된 파티션의 응답 캐시 무효화)
     
-    return courses
+    실행 결과는 /metrics에 기록하고, 실패는 호출한 쪽에서 로그로 남기도록 다시 발생시킵니다.
+    """
+    try:
+        report = await asyncio.to_thread(start_compaction, policy)
+        for partition in await asyncio.to_thread(list_partitions):
+            versions_deleted = report.versions_deleted
+            async with get_reschedule_coordinator(partition).lock:
+                await asyncio.to_thread(compact_partition, partition, report)
+            if report.versions_deleted > versions_deleted:
+                invalidate_response_cache(partition)
+        report = await asyncio.to_thread(finish_compaction, report)
+    except Exception:
+        record_compaction(trigger, False)
+        raise
+    record_compaction(trigger, True)
+    return report
 
 
-def get_next_version_number(db: Session) -> int:
-    """다음 버전 번호 가져오기"""
-    latest_version = db.query(TimetableVersion).order_by(TimetableVersion.version_number.desc()).first()
-    if latest_version:
-        return latest_version.version_number + 1
-    return 1
+async def compaction_loop():
+    """COMPACTION_INTERVAL_SECONDS마다 이력 정리 (실패는 로그로 남기고 다음 주기에 다시 시도)"""
+    while True:
+        await asyncio.sleep(COMPACTION_INTERVAL_SECONDS)
+        try:
+            await run_compaction_job(trigger="scheduled")
+        except Exception:
+            logger.exception("예약된 버전 이력 정리 실패, %g초 후 다시 시도", COMPACTION_INTERVAL_SECONDS)
 
 
-def save_version_history(db: Session, version_number: int, description: str = "") -> int:
-    """현재 시간표를 버전 이력으로 저장"""
-    # 이전 활성 버전 비활성화
-    db.query(TimetableVersion).filter(TimetableVersion.is_active == True).update({"is_active": False})
-    db.commit()
+async def request_reschedule(db: AsyncSession, partition: Partition, description: str, wait: bool):
+    """파티션 재배정 요청 (wait이면 병합 재배정 완료 후 시간표 반환, 아니면 202와 티켓 반환)"""
+    coordinator = get_reschedule_coordinator(partition)
+    ticket = coordinator.mark_dirty(description)
+    if not wait:
+        status = RescheduleStatusResponse(ticket=ticket, status="pending")
+        return JSONResponse(status_code=202, content=status.model_dump())
     
-    # 새 버전 생성
-    new_version = TimetableVersion(
-        version_number=version_number,
-        description=description,
-        is_active=True
-    )
-    db.add(new_version)
-    db.flush()
-    
-    # 현재 Schedule을 ScheduleHistory에 복사
-    current_schedules = db.query(Schedule).all()
-    for schedule in current_schedules:
-        history = ScheduleHistory(
-            version_id=new_version.id,
-            course_id=schedule.course_id,
-            course_code=schedule.course_code,
-            course_name=schedule.course_name,
-            instructor=schedule.instructor,
-            department=schedule.department,
-            day=schedule.day,
-            start_time=schedule.start_time,
-            end_time=schedule.end_time,
-            room=schedule.room,
-            is_lab=schedule.is_lab,
-            enrollment=schedule.enrollment,
-            weeks=schedule.weeks,
-            credits=schedule.credits
-        )
-        db.add(history)
+    result = await coordinator.wait(ticket)
+    if result.error:
+        raise HTTPException(status_code=500, detail=f"재배정 실패: {result.error}")
     
-    db.commit()
-    return new_version.id
+    schedules = (await db.execute(filter_schedules(select(*TIMETABLE_COLUMNS), partition).order_by(Schedule.id))).all()
+    return ORJSONResponse(timetable_payload(
+        [schedule_to_dict(schedule) for schedule in schedules],
+        get_timetable_metadata(version=result.version_number)
+    ))
 
 
 @app.post("/api/schedule/build", response_model=TimetableResponse)
 async def build_schedule(
     file: UploadFile = File(...),
-    db: Session = Depends(get_db)
+    reoptimize: bool = False,
+    seed: Optional[int] = None,
+    partition: Partition = Depends(get_partition)
 ):
     """
-    CSV 파일을 업로드하고 시간표 자동 배정 실행
+    CSV 파일을 업로드하고 파티션의 시간표 자동 배정 실행
+    
+    같은 파티션의 재배정과는 직렬화되고, 다른 파티션의 시간표 생성과는 별도 스레드에서 동시에 실행됩니다.
+    같은 내용의 CSV를 같은 파라미터로 다시 올리면 캐시된 배정을 사용합니다 (reoptimize=true이면 다시 배정).
+    seed를 지정하면 유전 알고리즘 결과가 재현됩니다.
     """
     try:
-        # CSV 파일 읽기
-        contents = await file.read()
-        csv_content = contents.decode("utf-8-sig")  # BOM 제거
-        
-        # Course 객체 리스트 생성
-        courses = load_courses_from_csv(csv_content)
-        
-        # 기존 데이터 삭제
-        db.query(Course).delete()
-        db.query(Schedule).delete()
-        db.commit()
-        
-        # 데이터베이스에 저장
-        for course in courses:
-            db.add(course)
-        db.commit()
-        
-        # 데이터베이스에서 다시 조회하여 ID를 포함한 Course 객체 사용
-        db_courses = db.query(Course).all()
-        
-        # 시간표 자동 배정
-        scheduler = TimetableScheduler(db_courses)
-        assignments = scheduler.schedule()
-        
-        # Schedule 테이블에 저장
-        save_schedules_to_db(db, assignments)
-        
-        # 응답 생성
-        timetable_list = [assignment.to_dict() for assignment in assignments]
-        return TimetableResponse(
-            timetable=timetable_list,
-            metadata=get_timetable_metadata()
-        )
+        async with get_reschedule_coordinator(partition).lock:
+            # 파티션의 기존 데이터 삭제 후 CSV를 청크 단위로 적재 (하나의 트랜잭션)
+            try:
+                ingest_report = await asyncio.to_thread(replace_partition_courses, partition, file.file)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=f"CSV 형식 오류: {str(e)}")
+            
+            # 시간표 자동 배정(또는 캐시 사용) 후 Schedule 테이블과 버전 이력 저장
+            timetable_list, version_number, cache_info = await asyncio.to_thread(
+                run_partition_build, partition, f"시간표 배정: {file.filename}", reoptimize, seed
+            )
+            
+            # 응답 생성
+            metadata = get_timetable_metadata(version=version_number)
+            metadata["ingest"] = ingest_report.to_dict()
+            metadata["buildCache"] = cache_info
+            return ORJSONResponse(timetable_payload(timetable_list, metadata))
     
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"시간표 배정 실패: {str(e)}")
 
 
 @app.get("/api/schedule", response_model=TimetableResponse)
-async def get_schedule(db: Session = Depends(get_db)):
+async def get_schedule(
+    request: Request,
+    room: Optional[str] = None,
+    day: Optional[str] = None,
+    instructor: Optional[str] = None,
+    department: Optional[str] = None,
+    is_lab: Optional[bool] = None,
+    cursor: Optional[int] = None,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    fmt: Optional[str] = Query(None, alias="format", pattern="^(json|columnar)$"),
+    partition: Partition = Depends(get_partition),
+    db: AsyncSession = Depends(get_async_db)
+):
     """
-    최신 배정된 시간표 조회
+    파티션의 최신 배정된 시간표 조회 (강의실/요일/교수/학과/실습 여부 필터, limit 지정 시 커서 페이지네이션)
+    
+    format=columnar 또는 Accept: application/vnd.timetable.columnar+json이면 컬럼형(사전 인코딩) 응답
     """
-    schedules = db.query(Schedule).all()
-    timetable_list = [schedule_to_dict(schedule) for schedule in schedules]
-    return TimetableResponse(
-        timetable=timetable_list,
-        metadata=get_timetable_metadata()
+    columnar = wants_columnar(fmt, request.headers.get("accept"))
+    
+    async def build() -> dict:
+        stmt = filter_schedules(select(*TIMETABLE_COLUMNS), partition, room, day, instructor, department, is_lab)
+        if cursor is not None:
+            stmt = stmt.where(Schedule.id > cursor)
+        stmt = stmt.order_by(Schedule.id)
+        
+        next_cursor = None
+        if limit is not None:
+            schedules = (await db.execute(stmt.limit(limit + 1))).all()
+            if len(schedules) > limit:
+                schedules = schedules[:limit]
+                next_cursor = schedules[-1].id
+        else:
+            schedules = (await db.execute(stmt)).all()
+        
+        if columnar:
+            return encode_timetable(schedules, get_timetable_metadata(), next_cursor)
+        timetable_list = [schedule_to_dict(schedule) for schedule in schedules]
+        return timetable_payload(timetable_list, get_timetable_metadata(), next_cursor)
+    
+    cache_key = ("schedule", room, day, instructor, department, is_lab, cursor, limit, columnar)
+    media_type = COLUMNAR_MEDIA_TYPE if columnar else "application/json"
+    return await cached_json_response(
+        request, partition, cache_key, await get_active_version_id_async(db, partition), build, media_type=media_type
     )
 
 
+@app.get("/api/schedule/export")
+async def export_schedule(
+    fmt: str = Query("csv", alias="format", pattern="^(csv|ics|xlsx)$"),
+    start: Optional[date] = None,
+    room: Optional[str] = None,
+    day: Optional[str] = None,
+    instructor: Optional[str] = None,
+    department: Optional[str] = None,
+    is_lab: Optional[bool] = None,
+    partition: Partition = Depends(get_partition)
+):
+    """
+    파티션의 현재 시간표 내보내기 (format=csv|ics|xlsx, ics는 start가 속한 주부터 매주 반복)
+    """
+    stmt = filter_schedules(select(Schedule), partition, room, day, instructor, department, is_lab).order_by(Schedule.id)
+    return export_response(fmt, stream_schedules(stmt), start)
+
+
 @app.get("/api/vacancy", response_model=VacancyResponse)
-async def get_vacancy(db: Session = Depends(get_db)):
+async def get_vacancy(
+    request: Request,
+    partition: Partition = Depends(get_partition),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    파티션의 공실 분석 결과 조회 (활성 버전 저장 시 계산된 결과 사용)
+    """
+    version_id = await get_active_version_id_async(db, partition)
+    
+    async def build() -> Union[VacancyResponse, str]:
+        if version_id is not None:
+            result = await get_version_vacancy_async(db, version_id)
+            if result is not None:
+                return result
+        
+        # 버전이 없는 경우 현재 시간표로 분석
+        schedules = list((await db.execute(filter_schedules(select(Schedule), partition))).scalars())
+        return VacancyResponse(**analyze_schedules(schedules))
+    
+    return await cached_json_response(request, partition, "vacancy", version_id, build)
+
+
+@app.get("/api/rooms/free", response_model=FreeRoomResponse)
+async def get_free_rooms(
+    request: Request,
+    day: Optional[str] = None,
+    start_time: str = "09:00",
+    end_time: str = "18:00",
+    duration: Optional[int] = Query(None, ge=1),
+    attendees: Optional[int] = Query(None, ge=1),
+    partition: Partition = Depends(get_partition),
+    db: AsyncSession = Depends(get_async_db)
+):
     """
-    공실 분석 결과 조회
+    빈 강의실 조회 (예: 화요일 13:30~15:00 전체가 빈 강의실, 이번 주 30명이 2시간 쓸 수 있는 강의실)
+    
+    duration(분)을 지정하면 범위 안에서 그만큼 연속으로 빈 시간이 있는 강의실과 빈 구간을, 없으면 범위 전체가 빈 강의실을 반환합니다.
+    day를 생략하면 모든 요일을 조회합니다.
+    attendees는 수용 인원이 설정된 강의실에만 적용되며, 설정 여부는 강의실별 capacityKnown과 query.capacityConfigured로 알립니다.
     """
-    schedules = db.query(Schedule).all()
-    
-    if not schedules:
-        return VacancyResponse(
-            vacancies=[],
-            summary={
-                "utilizationRateByRoom": {},
-                "overallUtilizationRate": 0.0
+    try:
+        days, start, end = parse_free_room_query(day, start_time, end_time, duration)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    version_id = await get_active_version_id_async(db, partition)
+    capacities = get_room_capacities()
+    
+    async def build() -> FreeRoomResponse:
+        index = get_cached_index(partition, version_id)
+        if index is None:
+            stmt = filter_schedules(
+                select(Schedule.room, Schedule.day, Schedule.start_time, Schedule.end_time), partition
+            )
+            index = FreeRoomIndex((await db.execute(stmt)).all())
+            cache_index(partition, version_id, index)
+        
+        return FreeRoomResponse(
+            rooms=index.find(days, start, end, duration, attendees, capacities),
+            query={
+                "days": days,
+                "startTime": start_time,
+                "endTime": end_time,
+                "duration": duration,
+                "attendees": attendees,
+                "capacityConfigured": bool(capacities)
             }
         )
     
-    # 공실 분석 실행
-    analyzer = VacancyAnalyzer(schedules)
-    result = analyzer.analyze()
-    
-    return VacancyResponse(**result)
+    cache_key = ("rooms-free", tuple(days), start, end, duration, attendees, tuple(sorted(capacities.items())))
+    return await cached_json_response(request, partition, cache_key, version_id, build)
 
 
 @app.post("/api/schedule/what-if")
 async def what_if_simulation(
-    unavailable_times: Optional[List[dict]] = None,
-    db: Session = Depends(get_db)
+    scenario: WhatIfRequest,
+    request: Request,
+    partition: Partition = Depends(get_partition),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     시뮬레이션 실행 (특강, 휴강, 대여 불가 시간 등 반영)
-    """
-    # TODO: 시뮬레이션 로직 구현
-    # 현재는 기본 시간표 반환
-    schedules = db.query(Schedule).all()
     
-    if not schedules:
-        raise HTTPException(status_code=404, detail="배정된 시간표가 없습니다.")
+    활성 시간표 사본에 사용 불가 시간과 추가 강의를 적용해 영향받은 강의만 재배정하고
+    변경 내역과 활용률을 반환합니다. 저장하지 않으며 결과는 시나리오 해시와 활성 버전별로 캐시합니다.
+    """
+    async def build() -> dict:
+        schedules = (await db.execute(filter_schedules(select(Schedule), partition).order_by(Schedule.id))).scalars().all()
+        if not schedules:
+            raise HTTPException(status_code=404, detail="배정된 시간표가 없습니다.")
+        
+        records = [record_from_row(schedule) for schedule in schedules]
+        try:
+            return simulate(records, scenario)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
     
-    # 시뮬레이션 결과 반환
-    return {
-        "message": "시뮬레이션 기능은 향후 구현 예정입니다.",
-        "current_schedule_count": len(schedules)
-    }
+    cache_key = ("what-if", scenario_hash(scenario))
+    return await cached_json_response(
+        request, partition, cache_key, await get_active_version_id_async(db, partition), build
+    )
 
 
 # 강의 관리 API
 @app.post("/api/courses/add")
 async def add_course(
     course_data: CourseAddRequest,
-    db: Session = Depends(get_db)
+    wait: bool = True,
+    partition: Partition = Depends(get_partition),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """개별 강의 추가 및 재배정"""
+    """개별 강의 추가 및 재배정 (wait=false이면 재배정 완료를 기다리지 않고 티켓 반환)"""
     try:
         # 새 강의 추가
-        new_course = Course(
-            process=course_data.process,
-            department=course_data.department,
-            course_code=course_data.course_code,
-            course_name=course_data.course_name,
-            grade=0,
-            area=course_data.area,
-            enrollment=course_data.enrollment,
-            main_instructor=course_data.main_instructor,
-            instructor=course_data.instructor,
-            weeks=course_data.weeks,
-            credits=course_data.credits,
-            is_lab=course_data.is_lab
-        )
+        new_course = create_course_from_request(course_data, partition)
         db.add(new_course)
-        db.commit()
+        await db.commit()
+        invalidate_response_cache(partition)
         
-        # 전체 재배정
-        assignments, version_number = reschedule_all(
-            db, f"강의 추가: {course_data.course_name}"
-        )
-        
-        # 응답 생성
-        timetable_list = [assignment.to_dict() for assignment in assignments]
-        return TimetableResponse(
-            timetable=timetable_list,
-            metadata=get_timetable_metadata(version=version_number)
-        )
+        # 파티션 전체 재배정 (다른 변경과 병합)
+        return await request_reschedule(db, partition, f"강의 추가: {course_data.course_name}", wait)
     
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"강의 추가 실패: {str(e)}")
 
 
 @app.delete("/api/courses/{course_id}")
-async def delete_course(course_id: int, db: Session = Depends(get_db)):
-    """강의 삭제 및 재배정"""
+async def delete_course(
+    course_id: int,
+    wait: bool = True,
+    partition: Partition = Depends(get_partition),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """강의 삭제 및 재배정 (wait=false이면 재배정 완료를 기다리지 않고 티켓 반환)"""
     try:
-        course = db.query(Course).filter(Course.id == course_id).first()
+        course = (await db.execute(
+            select(Course).where(Course.in_partition(partition), Course.id == course_id)
+        )).scalars().first()
         if not course:
             raise HTTPException(status_code=404, detail="강의를 찾을 수 없습니다.")
         
         # 논리적 삭제
         course.is_deleted = True
-        db.commit()
+        await db.commit()
+        invalidate_response_cache(partition)
         
-        # 전체 재배정
-        assignments, version_number = reschedule_all(
-            db, f"강의 삭제: {course.course_name}"
-        )
+        # 파티션 전체 재배정 (다른 변경과 병합)
+        return await request_reschedule(db, partition, f"강의 삭제: {course.course_name}", wait)
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"강의 삭제 실패: {str(e)}")
+
+
+@app.post("/api/courses/batch", response_model=TimetableResponse)
+async def batch_update_courses(
+    batch: CourseBatchRequest,
+    wait: bool = True,
+    partition: Partition = Depends(get_partition),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """강의 일괄 추가/삭제/수정 (하나의 트랜잭션으로 반영 후 한 번만 재배정)"""
+    if not (batch.add or batch.delete or batch.update):
+        raise HTTPException(status_code=400, detail="변경할 강의가 없습니다.")
+    
+    try:
+        # 삭제/수정 대상 강의 조회
+        target_ids = set(batch.delete) | {update.id for update in batch.update}
+        courses = {
+            course.id: course
+            for course in (await db.execute(
+                select(Course).where(Course.in_partition(partition), Course.id.in_(target_ids))
+            )).scalars()
+        }
+        missing_ids = sorted(target_ids - courses.keys())
+        if missing_ids:
+            raise HTTPException(status_code=404, detail=f"강의를 찾을 수 없습니다: {missing_ids}")
         
-        # 응답 생성
-        timetable_list = [assignment.to_dict() for assignment in assignments]
-        return TimetableResponse(
-            timetable=timetable_list,
-            metadata=get_timetable_metadata(version=version_number)
+        # 변경 사항 반영 (한 번에 커밋)
+        for course_data in batch.add:
+            db.add(create_course_from_request(course_data, partition))
+        for update in batch.update:
+            course = courses[update.id]
+            for field, value in update.model_dump(exclude_unset=True, exclude={"id"}).items():
+                setattr(course, field, value)
+        for course_id in batch.delete:
+            courses[course_id].is_deleted = True
+        await db.commit()
+        invalidate_response_cache(partition)
+        
+        # 파티션 전체 재배정 (1회, 다른 변경과 병합)
+        return await request_reschedule(
+            db,
+            partition,
+            f"일괄 변경: 추가 {len(batch.add)}건, 삭제 {len(batch.delete)}건, 수정 {len(batch.update)}건",
+            wait
         )
     
     except HTTPException:
+        await db.rollback()
         raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"강의 삭제 실패: {str(e)}")
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=f"강의 일괄 변경 실패: {str(e)}")
+
+
+@app.get("/api/reschedule/{ticket}", response_model=RescheduleStatusResponse)
+async def get_reschedule_status(
+    ticket: int,
+    timeout: float = Query(0, ge=0, le=60),
+    partition: Partition = Depends(get_partition)
+):
+    """파티션의 재배정 티켓 상태 조회 (timeout 초 동안 완료 대기)"""
+    coordinator = _reschedule_coordinators.get(partition)
+    if coordinator is None or not coordinator.is_known(ticket):
+        raise HTTPException(status_code=404, detail="재배정 요청을 찾을 수 없습니다.")
+    
+    if timeout > 0:
+        result = await coordinator.wait(ticket, timeout)
+    else:
+        result = coordinator.get_result(ticket)
+    
+    if result is None:
+        return RescheduleStatusResponse(ticket=ticket, status="pending")
+    if result.error:
+        return RescheduleStatusResponse(ticket=ticket, status="failed", detail=result.error)
+    return RescheduleStatusResponse(ticket=ticket, status="done", version=result.version_number)
 
 
 @app.get("/api/courses", response_model=CourseListResponse)
-async def list_courses(db: Session = Depends(get_db)):
-    """강의 목록 조회 (삭제되지 않은 것만)"""
-    courses = db.query(Course).filter(Course.is_deleted == False).order_by(Course.id).all()
-    
-    course_list = []
-    for course in courses:
-        course_list.append(CourseInfo(
-            id=course.id,
-            process=course.process,
-            department=course.department,
-            courseCode=course.course_code,
-            courseName=course.course_name,
-            grade=course.grade,
-            area=course.area,
-            enrollment=course.enrollment,
-            mainInstructor=course.main_instructor,
-            instructor=course.instructor,
-            weeks=course.weeks,
-            credits=course.credits,
-            isLab=course.is_lab,
-            createdAt=course.created_at.isoformat() if course.created_at else "",
-            updatedAt=course.updated_at.isoformat() if course.updated_at else ""
-        ))
+async def list_courses(
+    request: Request,
+    partition: Partition = Depends(get_partition),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """파티션의 강의 목록 조회 (삭제되지 않은 것만)"""
+    async def build() -> CourseListResponse:
+        result = await db.execute(
+            select(Course).where(Course.in_partition(partition), Course.is_deleted == False).order_by(Course.id)
+        )
+        courses = result.scalars().all()
+        
+        course_list = []
+        for course in courses:
+            course_list.append(CourseInfo(
+                id=course.id,
+                process=course.process,
+                department=course.department,
+                courseCode=course.course_code,
+                courseName=course.course_name,
+                grade=course.grade,
+                area=course.area,
+                enrollment=course.enrollment,
+                mainInstructor=course.main_instructor,
+                instructor=course.instructor,
+                weeks=course.weeks,
+                credits=course.credits,
+                isLab=course.is_lab,
+                createdAt=course.created_at.isoformat() if course.created_at else "",
+                updatedAt=course.updated_at.isoformat() if course.updated_at else ""
+            ))
+        
+        return CourseListResponse(courses=course_list)
     
-    return CourseListResponse(courses=course_list)
+    return await cached_json_response(
+        request, partition, "courses", await get_active_version_id_async(db, partition), build
+    )
 
 
 # 버전 관리 API
 @app.get("/api/versions", response_model=VersionResponse)
-async def list_versions(db: Session = Depends(get_db)):
-    """버전 목록 조회"""
-    versions = db.query(TimetableVersion).order_by(TimetableVersion.version_number.desc()).all()
+async def list_versions(
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[int] = None,
+    partition: Partition = Depends(get_partition),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """파티션의 버전 목록 조회 (최신순, 커서 페이지네이션)"""
+    versions, next_cursor = await list_versions_page_async(db, partition, limit, cursor)
     
     version_list = []
     for version in versions:
-        # 각 버전의 과목 수 계산
-        course_count = db.query(ScheduleHistory).filter(
-            ScheduleHistory.version_id == version.id
-        ).count()
-        
         version_list.append(VersionInfo(
             id=version.id,
             versionNumber=version.version_number,
             createdAt=version.created_at.isoformat() if version.created_at else "",
             description=version.description or "",
             isActive=version.is_active,
-            courseCount=course_count
+            courseCount=version.course_count or 0,
+            roomsUsed=version.rooms_used.split(",") if version.rooms_used else [],
+            utilizationRate=version.utilization_rate or 0.0,
+            tag=version.tag
         ))
     
-    return VersionResponse(versions=version_list)
+    return VersionResponse(versions=version_list, nextCursor=next_cursor)
+
+
+@app.put("/api/versions/{version_id}/tag")
+async def tag_version(
+    version_id: int,
+    tag_request: VersionTagRequest,
+    partition: Partition = Depends(get_partition),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """버전 보존 태그 지정 (태그된 버전은 이력 정리에서 제외, null이면 해제, 같은 파티션의 이력 정리와 직렬화)"""
+    async with get_reschedule_coordinator(partition).lock:
+        version = await get_partition_version_async(db, partition, version_id)
+        if not version:
+            raise HTTPException(status_code=404, detail="버전을 찾을 수 없습니다.")
+        
+        version.tag = tag_request.tag or None
+        await db.commit()
+    return {"id": version.id, "versionNumber": version.version_number, "tag": version.tag}
+
+
+@app.post("/api/maintenance/compact")
+async def compact_history(
+    keep_last: Optional[int] = Query(None, ge=1),
+    keep_daily_days: Optional[int] = Query(None, ge=0)
+):
+    """모든 파티션에 보존 정책을 적용해 버전 이력 정리 후 VACUUM (지정하지 않은 값은 기본 정책 사용)"""
+    policy = RetentionPolicy()
+    if keep_last is not None:
+        policy.keep_last = keep_last
+    if keep_daily_days is not None:
+        policy.keep_daily_days = keep_daily_days
+    
+    try:
+        report = await run_compaction_job(policy)
+    except Exception as e:
+        logger.exception("버전 이력 정리 실패")
+        raise HTTPException(status_code=500, detail=f"버전 이력 정리 실패: {str(e)}")
+    return report.to_dict()
+
+
+@app.get("/api/maintenance/compact")
+async def get_compaction_report():
+    """마지막 이력 정리 결과 조회"""
+    report = get_last_compaction_report()
+    if report is None:
+        raise HTTPException(status_code=404, detail="아직 이력 정리가 실행되지 않았습니다.")
+    return report.to_dict()
 
 
 @app.get("/api/versions/{version_id}/schedule", response_model=TimetableResponse)
-async def get_version_schedule(version_id: int, db: Session = Depends(get_db)):
-    """특정 버전의 시간표 조회"""
-    history_schedules = db.query(ScheduleHistory).filter(
-        ScheduleHistory.version_id == version_id
-    ).all()
-    
-    timetable_list = [schedule_to_dict(schedule) for schedule in history_schedules]
-    return TimetableResponse(
-        timetable=timetable_list,
-        metadata=get_timetable_metadata()
-    )
+async def get_version_schedule(
+    version_id: int,
+    request: Request,
+    partition: Partition = Depends(get_partition),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """특정 버전의 시간표 조회 (저장된 버전은 변경되지 않으므로 버전 ID로 캐시)"""
+    async def build() -> dict:
+        history_schedules = []
+        if await get_partition_version_async(db, partition, version_id) is not None:
+            history_schedules = await reconstruct_version_async(db, version_id) or []
+        timetable_list = [schedule_to_dict(schedule) for schedule in history_schedules]
+        return timetable_payload(timetable_list, get_timetable_metadata())
+    
+    return await cached_json_response(request, partition, "version_schedule", version_id, build)
+
+
+@app.get("/api/versions/{version_id}/export")
+async def export_version_schedule(
+    version_id: int,
+    fmt: str = Query("csv", alias="format", pattern="^(csv|ics|xlsx)$"),
+    start: Optional[date] = None,
+    partition: Partition = Depends(get_partition),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """특정 버전의 시간표 내보내기 (델타 복원 결과를 순회하며 전송)"""
+    version = await get_partition_version_async(db, partition, version_id)
+    if not version:
+        raise HTTPException(status_code=404, detail="버전을 찾을 수 없습니다.")
+    
+    history_schedules = await reconstruct_version_async(db, version_id) or []
+    return export_response(fmt, history_schedules, start, version.version_number)
+
+
+@app.get("/api/versions/{version_id}/diff/{other_version_id}")
+async def diff_version_schedules(
+    version_id: int,
+    other_version_id: int,
+    request: Request,
+    partition: Partition = Depends(get_partition),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """같은 파티션의 두 버전 비교 (version_id -> other_version_id로 이동/추가/삭제된 강의와 활용률 변화)"""
+    async def build() -> dict:
+        for vid in (version_id, other_version_id):
+            if await get_partition_version_async(db, partition, vid) is None:
+                raise HTTPException(status_code=404, detail="버전을 찾을 수 없습니다.")
+        return await diff_versions_async(db, version_id, other_version_id)
+    
+    cache_key = ("version_diff", version_id, other_version_id)
+    return await cached_json_response(request, partition, cache_key, None, build)
+
+
+@app.get("/api/versions/{version_id}/vacancy", response_model=VacancyResponse)
+async def get_version_vacancy_analysis(
+    version_id: int,
+    request: Request,
+    partition: Partition = Depends(get_partition),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """특정 버전의 공실 분석 결과 조회"""
+    async def build() -> str:
+        result = None
+        if await get_partition_version_async(db, partition, version_id) is not None:
+            result = await get_version_vacancy_async(db, version_id)
+        if result is None:
+            raise HTTPException(status_code=404, detail="버전을 찾을 수 없습니다.")
+        return result
+    
+    return await cached_json_response(request, partition, "version_vacancy", version_id, build)
 
 
 @app.post("/api/versions/{version_id}/restore", response_model=TimetableResponse)
-async def restore_version(version_id: int, db: Session = Depends(get_db)):
-    """특정 버전으로 시간표 복원"""
+async def restore_version(
+    version_id: int,
+    partition: Partition = Depends(get_partition),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """파티션의 시간표를 특정 버전으로 복원 (같은 파티션의 재배정/시간표 생성/이력 정리와 직렬화)"""
     try:
-        version = db.query(TimetableVersion).filter(TimetableVersion.id == version_id).first()
+        version = await get_partition_version_async(db, partition, version_id)
         if not version:
             raise HTTPException(status_code=404, detail="버전을 찾을 수 없습니다.")
         
-        history_schedules = db.query(ScheduleHistory).filter(
-            ScheduleHistory.version_id == version_id
-        ).all()
+        history_schedules = await reconstruct_version_async(db, version_id)
         
         if not history_schedules:
             raise HTTPException(status_code=404, detail="해당 버전의 시간표 데이터가 없습니다.")
         
-        # 버전 이력 저장 (현재 버전)
-        version_number = get_next_version_number(db)
-        save_version_history(db, version_number, f"버전 복원: {version.version_number}번 버전")
-        
-        # 기존 Schedule 삭제 및 버전 데이터로 복원
-        db.query(Schedule).delete()
-        for history in history_schedules:
-            schedule = create_schedule_from_history(history)
-            db.add(schedule)
-        db.commit()
+        async with get_reschedule_coordinator(partition).lock:
+            # 파티션의 기존 Schedule 삭제 및 버전 데이터로 복원
+            await db.execute(delete(Schedule).where(Schedule.in_partition(partition)))
+            db.add_all([create_schedule_from_history(history, partition) for history in history_schedules])
+            await db.commit()
+            
+            # 복원된 시간표를 새 버전으로 저장 (버전 저장과 공실 분석은 별도 스레드)
+            version_number = await asyncio.to_thread(
+                run_partition_version_save, partition, f"버전 복원: {version.version_number}번 버전"
+            )
         
         # 응답 생성
         timetable_list = [schedule_to_dict(history) for history in history_schedules]
-        return TimetableResponse(
-            timetable=timetable_list,
-            metadata=get_timetable_metadata(
+        return ORJSONResponse(timetable_payload(
+            timetable_list,
+            get_timetable_metadata(
                 version=version_number,
                 restored_from=version.version_number
             )
-        )
+        ))
     
     except HTTPException:
         raise
@@ -486,6 +1025,12 @@ async def restore_version(version_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=f"버전 복원 실패: {str(e)}")
 
 
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Prometheus 텍스트 형식 서비스 지표"""
+    return PlainTextResponse(render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
+
 @app.get("/", response_class=HTMLResponse)
 async def root():
     """루트 엔드포인트 - 메인 페이지"""
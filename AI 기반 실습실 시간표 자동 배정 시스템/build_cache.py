@@ -0,0 +1,111 @@
+"""
+CSV 시간표 생성 결과 캐시 (내용 주소 기반)
+
+적재·정규화된 강의 목록을 정렬하여 해시하고, 유전 알고리즘 파라미터와 seed를 더해 캐시 키를 만듭니다.
+같은 CSV를 다시 올리면(행 순서가 달라도) 유전 알고리즘을 건너뛰고 저장된 배정을 새 강의 ID에 연결합니다.
+배정은 정규화 순서의 강의 번호로 저장하므로 파티션이 달라도 재사용됩니다.
+"""
+import hashlib
+import os
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import orjson
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+import scheduler
+from models import BuildCacheEntry, Course
+from scheduler import CourseAssignment
+
+BUILD_CACHE_MAX_ENTRIES = int(os.getenv("TIMETABLE_BUILD_CACHE_MAX_ENTRIES", "100"))  # 최근 사용 기준 보관 수
+
+# 배정 결과에 영향을 주는 강의 필드 (CSV 적재 후 정규화된 값)
+COURSE_FIELDS = (
+    "process", "department", "course_code", "course_name", "grade", "area", "enrollment",
+    "main_instructor", "instructor", "weeks", "credits", "is_lab"
+)
+
+
+def course_fingerprint(course: Course) -> Tuple:
+    """강의 비교용 값 (ID, 파티션, 시각 제외)"""
+    return tuple(getattr(course, field) for field in COURSE_FIELDS)
+
+
+def canonical_order(courses: List[Course]) -> List[Course]:
+    """정규화 순서 (강의 값 기준 정렬, CSV 행 순서와 무관)"""
+    return sorted(courses, key=lambda course: (orjson.dumps(course_fingerprint(course)), course.id))
+
+
+def ga_parameters(seed: Optional[int]) -> Dict:
+    """배정 결과를 결정하는 유전 알고리즘 파라미터 (호출 시점의 scheduler 모듈 값)"""
+    return {
+        "populationSize": scheduler.POPULATION_SIZE,
+        "maxGenerations": scheduler.MAX_GENERATIONS,
+        "crossoverRate": scheduler.CROSSOVER_RATE,
+        "mutationRate": scheduler.MUTATION_RATE,
+        "eliteSize": scheduler.ELITE_SIZE,
+        "tournamentSize": scheduler.TOURNAMENT_SIZE,
+        "rooms": scheduler.ALL_ROOMS,
+        "timeSlots": scheduler.TIME_SLOTS,
+        "seed": seed
+    }
+
+
+def build_cache_key(courses: List[Course], seed: Optional[int]) -> str:
+    """캐시 키 (정렬된 강의 목록 해시 + 파라미터)"""
+    digest = hashlib.sha256()
+    for course in canonical_order(courses):
+        digest.update(orjson.dumps(course_fingerprint(course)))
+        digest.update(b"\n")
+    digest.update(orjson.dumps(ga_parameters(seed), option=orjson.OPT_SORT_KEYS))
+    return digest.hexdigest()
+
+
+def get_cached_assignments(db: Session, key: str, courses: List[Course]) -> Optional[List[CourseAssignment]]:
+    """캐시된 배정을 현재 강의에 연결 (없으면 None, 적중 기록은 호출자의 커밋에 포함)"""
+    entry = db.get(BuildCacheEntry, key)
+    if entry is None or entry.course_count != len(courses):
+        return None
+
+    ordered = canonical_order(courses)
+    assignments = [
+        CourseAssignment(ordered[index], day, start_time, end_time, room)
+        for index, day, start_time, end_time, room in orjson.loads(entry.assignments)
+    ]
+    assignments.sort(key=lambda assignment: assignment.course.id)  # 유전 알고리즘 결과와 같은 순서
+    entry.hits = (entry.hits or 0) + 1
+    entry.last_used_at = datetime.utcnow()
+    return assignments
+
+
+def assignment_rows(courses: List[Course], assignments: List[CourseAssignment]) -> List[List]:
+    """캐시 저장용 배정 행 (정규화 순서의 강의 번호 기준)"""
+    index_by_id = {course.id: index for index, course in enumerate(canonical_order(courses))}
+    return [[index_by_id[a.course.id], a.day, a.start_time, a.end_time, a.room] for a in assignments]
+
+
+def store_cached_assignments(db: Session, key: str, course_count: int, rows: List[List], fitness: Optional[float]) -> None:
+    """배정 결과 캐시 저장 및 오래된 항목 정리 (별도 커밋, 같은 키를 동시에 저장한 경우 먼저 저장된 결과 유지)"""
+    now = datetime.utcnow()
+    db.merge(BuildCacheEntry(
+        cache_key=key,
+        course_count=course_count,
+        assignments=orjson.dumps(rows).decode(),
+        fitness=fitness,
+        created_at=now,
+        last_used_at=now,
+        hits=0
+    ))
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        return
+
+    stale = db.query(BuildCacheEntry.cache_key).order_by(
+        BuildCacheEntry.last_used_at.desc()
+    ).offset(BUILD_CACHE_MAX_ENTRIES).all()
+    if stale:
+        db.query(BuildCacheEntry).filter(
+            BuildCacheEntry.cache_key.in_([row.cache_key for row in stale])
+        ).delete(synchronize_session=False)
+        db.commit()
@@ -0,0 +1,197 @@
+"""
+빈 강의실 조회 (강의실/요일별 사용 구간 색인)
+
+활성 시간표의 배정을 강의실·요일별로 정렬·병합된 사용 구간 배열로 만들어 두고,
+임의의 시간 범위가 비어 있는지, 또는 그 안에 원하는 길이의 빈 시간이 있는지를
+이진 탐색으로 찾습니다 (강의실·요일당 O(log n) + 찾은 빈 시간 수).
+색인은 파티션별로 활성 버전 ID와 함께 보관하여 버전이 바뀌면 다시 만듭니다.
+"""
+import logging
+import os
+from bisect import bisect_right
+from collections import OrderedDict
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+from scheduler import ALL_ROOMS, DAYS, time_to_minutes, minutes_to_time
+
+FREE_ROOM_INDEX_CACHE_SIZE = 64  # 색인을 보관할 파티션 수
+
+logger = logging.getLogger(__name__)
+
+Interval = Tuple[int, int]
+
+
+def parse_room_capacities(value: str) -> Dict[str, int]:
+    """강의실 수용 인원 설정 파싱 ("1215=40,1216=30", 설정되지 않은 강의실은 제한 없음, 형식 오류 시 ValueError)"""
+    capacities = {}
+    for item in value.split(","):
+        if not item.strip():
+            continue
+        room, separator, capacity = item.partition("=")
+        if not separator or not room.strip():
+            raise ValueError(f"강의실=인원 형식이 아닙니다: {item.strip()}")
+        capacities[room.strip()] = int(capacity)
+    return capacities
+
+
+# (설정 값, 파싱 결과)
+_room_capacities: Tuple[Optional[str], Dict[str, int]] = (None, {})
+
+
+def get_room_capacities() -> Dict[str, int]:
+    """
+    TIMETABLE_ROOM_CAPACITIES 설정 (값이 바뀔 때만 다시 파싱)
+
+    형식이 잘못되면 그 값에 대해 한 번 경고하고 수용 인원 정보 없이 동작하며, 설정을 고치면 다음 조회부터 반영됩니다.
+    """
+    global _room_capacities
+    value = os.getenv("TIMETABLE_ROOM_CAPACITIES", "")
+    if value != _room_capacities[0]:
+        try:
+            capacities = parse_room_capacities(value)
+        except ValueError as e:
+            logger.warning("TIMETABLE_ROOM_CAPACITIES 설정을 무시합니다 (%s): %r", e, value)
+            capacities = {}
+        _room_capacities = (value, capacities)
+    return _room_capacities[1]
+
+
+def parse_time(value: str) -> int:
+    """HH:MM을 분으로 변환 (형식 오류 시 ValueError)"""
+    try:
+        return time_to_minutes(value)
+    except (ValueError, AttributeError):
+        raise ValueError(f"시간 형식이 올바르지 않습니다: {value}")
+
+
+class DayIntervals:
+    """한 강의실·요일의 사용 구간 (시작 시각 순, 겹치거나 맞닿은 구간은 병합)"""
+    __slots__ = ("starts", "ends")
+
+    def __init__(self, intervals: Iterable[Interval]):
+        merged: List[List[int]] = []
+        for start, end in sorted(intervals):
+            if merged and start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        self.starts = [start for start, _ in merged]
+        self.ends = [end for _, end in merged]
+
+    def is_free(self, start: int, end: int) -> bool:
+        """[start, end) 구간 전체가 비어 있는지 확인"""
+        i = bisect_right(self.starts, start) - 1  # start 이전에 시작한 마지막 사용 구간
+        if i >= 0 and self.ends[i] > start:
+            return False
+        return i + 1 >= len(self.starts) or self.starts[i + 1] >= end
+
+    def free_windows(self, start: int, end: int, duration: int) -> List[Interval]:
+        """[start, end) 안에서 duration분 이상 연속으로 비어 있는 구간"""
+        windows = []
+        i = bisect_right(self.starts, start) - 1
+        cursor = max(start, self.ends[i]) if i >= 0 else start
+        i += 1
+        while cursor < end:
+            gap_end = min(self.starts[i], end) if i < len(self.starts) else end
+            if gap_end - cursor >= duration:
+                windows.append((cursor, gap_end))
+            if i >= len(self.starts):
+                break
+            cursor = max(cursor, self.ends[i])
+            i += 1
+        return windows
+
+
+_EMPTY_DAY = DayIntervals(())
+
+
+class FreeRoomIndex:
+    """시간표 전체의 강의실·요일별 사용 구간 색인"""
+
+    def __init__(self, schedules: Iterable):
+        intervals: Dict[Tuple[str, str], List[Interval]] = {}
+        for schedule in schedules:
+            start, end = time_to_minutes(schedule.start_time), time_to_minutes(schedule.end_time)
+            if end > start:
+                intervals.setdefault((schedule.room, schedule.day), []).append((start, end))
+        self.days = {key: DayIntervals(values) for key, values in intervals.items()}
+        extra_rooms = sorted({room for room, _ in intervals} - set(ALL_ROOMS))
+        self.rooms = list(ALL_ROOMS) + extra_rooms  # 시간표에만 있는 강의실도 포함
+
+    def find(
+        self,
+        days: Sequence[str],
+        start: int,
+        end: int,
+        duration: Optional[int] = None,
+        attendees: Optional[int] = None,
+        capacities: Optional[Dict[str, int]] = None
+    ) -> List[Dict]:
+        """
+        빈 강의실 찾기 (요일, 강의실 순)
+
+        duration이 없으면 [start, end) 전체가 빈 강의실을, 있으면 그 안에 duration분 이상 빈 시간이 있는 강의실을 찾습니다.
+        attendees를 지정하면 수용 인원이 설정된 강의실 중 부족한 곳은 제외합니다.
+        수용 인원이 설정되지 않은 강의실은 걸러지지 않으며 capacityKnown이 False입니다.
+        """
+        capacities = get_room_capacities() if capacities is None else capacities
+        rooms = [
+            room for room in self.rooms
+            if attendees is None or capacities.get(room) is None or capacities[room] >= attendees
+        ]
+        results = []
+        for day in days:
+            for room in rooms:
+                intervals = self.days.get((room, day), _EMPTY_DAY)
+                if duration is None:
+                    windows = [(start, end)] if intervals.is_free(start, end) else []
+                else:
+                    windows = intervals.free_windows(start, end, duration)
+                if windows:
+                    results.append({
+                        "room": room,
+                        "day": day,
+                        "capacity": capacities.get(room),
+                        "capacityKnown": room in capacities,
+                        "freeWindows": [
+                            {"startTime": minutes_to_time(s), "endTime": minutes_to_time(e), "minutes": e - s}
+                            for s, e in windows
+                        ]
+                    })
+        return results
+
+
+def parse_free_room_query(
+    day: Optional[str], start_time: str, end_time: str, duration: Optional[int]
+) -> Tuple[List[str], int, int]:
+    """조회 조건 검증 (요일 목록, 시작/종료 분 반환, 오류 시 ValueError)"""
+    if day is not None and day not in DAYS:
+        raise ValueError(f"알 수 없는 요일입니다: {day}")
+    start, end = parse_time(start_time), parse_time(end_time)
+    if start >= end:
+        raise ValueError(f"종료 시간이 시작 시간보다 늦어야 합니다: {start_time}~{end_time}")
+    if duration is not None and duration > end - start:
+        raise ValueError(f"필요 시간({duration}분)이 조회 범위({end - start}분)보다 깁니다.")
+    return ([day] if day is not None else list(DAYS)), start, end
+
+
+# 파티션 -> (활성 버전 ID, 색인)
+_indexes: "OrderedDict[Hashable, Tuple[Optional[int], FreeRoomIndex]]" = OrderedDict()
+
+
+def get_cached_index(partition: Hashable, version_id: Optional[int]) -> Optional[FreeRoomIndex]:
+    """활성 버전이 같을 때 만든 파티션 색인 (버전이 없으면 캐시하지 않음)"""
+    entry = _indexes.get(partition)
+    if version_id is None or entry is None or entry[0] != version_id:
+        return None
+    _indexes.move_to_end(partition)
+    return entry[1]
+
+
+def cache_index(partition: Hashable, version_id: Optional[int], index: FreeRoomIndex) -> None:
+    """파티션 색인 저장 (오래 쓰지 않은 파티션부터 제거)"""
+    if version_id is None:
+        return
+    _indexes[partition] = (version_id, index)
+    _indexes.move_to_end(partition)
+    while len(_indexes) > FREE_ROOM_INDEX_CACHE_SIZE:
+        _indexes.popitem(last=False)
@@ -0,0 +1,363 @@
+"""
+시간표 API 부하 테스트
+
+앱을 프로세스 안에서(ASGI) 또는 로컬 uvicorn 서버(--url)에 대해 실행하고
+시나리오별 처리량과 p50/p95/p99 지연 시간을 출력합니다.
+요청은 실행마다 새 테넌트 파티션(loadtest-<시각>)에서 보냅니다.
+프로세스 내 실행은 기본적으로 임시 SQLite 파일을 사용하고 끝나면 지웁니다 (--database-url로 지정 가능).
+교과목 CSV는 --seed로 재현 가능하게 생성합니다.
+
+사용 예:
+    python loadtest.py                                    # 모든 시나리오, 프로세스 내 실행
+    python loadtest.py --scenario vacancy_polling --concurrency 64
+    python loadtest.py --url http://127.0.0.1:8000 --json result.json
+"""
+import argparse
+import asyncio
+import csv
+import io
+import json
+import math
+import os
+import random
+import tempfile
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+import httpx
+
+# 기본 파라미터
+DEFAULT_CONCURRENCY = 16
+DEFAULT_DURATION_SECONDS = 10.0
+DEFAULT_COURSES = 40  # 실습실 5개에 모두 배정 가능한 규모 (예시 CSV와 같은 수)
+DEFAULT_VERSIONS = 2000
+DEFAULT_COURSE_ADDS = 50
+REQUEST_TIMEOUT_SECONDS = 600.0
+
+CSV_HEADER = [
+    "과정", "개설학과", "교과목코드", "교과목명", "개설학년", "영역구분", "수강인원",
+    "강좌대표교수", "강좌담당교수", "수업주수", "교과목학점", "강의유형구분"
+]
+DEPARTMENTS = ["소프트웨어융합학과", "컴퓨터공학과", "정보통신학과", "데이터사이언스학과", "게임공학과"]
+AREAS = ["전공", "교양", "전공심화"]
+
+
+def generate_courses_csv(count: int, seed: int = 0) -> bytes:
+    """교과목 CSV 생성 (같은 seed면 같은 내용, 강사 수는 강의 수의 1/3)"""
+    rng = random.Random(seed)
+    instructors = [f"교수{i:03d}" for i in range(max(count // 3, 1))]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_HEADER)
+    for i in range(count):
+        instructor = rng.choice(instructors)
+        writer.writerow([
+            "학부", rng.choice(DEPARTMENTS), f"LT{i:05d}", f"부하테스트과목{i}",
+            rng.randint(1, 4), rng.choice(AREAS), rng.randint(10, 40),
+            instructor, instructor, rng.choice([7, 15]), rng.choice([2, 3]),
+            "실습" if rng.random() < 0.8 else "이론"
+        ])
+    return buffer.getvalue().encode("utf-8-sig")
+
+
+def course_add_payload(index: int) -> Dict:
+    """강의 추가 요청 본문"""
+    return {
+        "process": "학부",
+        "department": DEPARTMENTS[index % len(DEPARTMENTS)],
+        "course_code": f"LTADD{index:04d}",
+        "course_name": f"부하테스트추가과목{index}",
+        "grade": 1 + index % 4,
+        "area": "전공",
+        "enrollment": 20,
+        "main_instructor": f"추가교수{index % 10}",
+        "instructor": f"추가교수{index % 10}",
+        "weeks": 15,
+        "credits": 3,
+        "is_lab": True
+    }
+
+
+class LatencyRecorder:
+    """한 종류 요청의 지연 시간과 오류 수"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.latencies: List[float] = []
+        self.errors = 0
+        self.statuses: Dict[int, int] = {}
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+
+    def record(self, seconds: float, status: Optional[int]) -> None:
+        """응답 하나 기록 (status가 None이면 연결 오류)"""
+        self.latencies.append(seconds)
+        if status is not None:
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+        if status is None or status >= 400:
+            self.errors += 1
+
+    def finish(self) -> None:
+        """측정 종료 (처리량 계산 기준)"""
+        self.finished = time.perf_counter()
+
+    def percentile(self, p: float) -> float:
+        """지연 시간 백분위수 (최근접 순위, 초)"""
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        rank = max(math.ceil(p / 100 * len(ordered)) - 1, 0)
+        return ordered[min(rank, len(ordered) - 1)]
+
+    def to_dict(self) -> Dict:
+        """결과 딕셔너리 (시간은 ms)"""
+        elapsed = (self.finished or time.perf_counter()) - self.started
+        return {
+            "name": self.name,
+            "requests": len(self.latencies),
+            "errors": self.errors,
+            "statuses": {str(status): count for status, count in sorted(self.statuses.items())},
+            "elapsedSeconds": round(elapsed, 3),
+            "throughput": round(len(self.latencies) / elapsed, 2) if elapsed > 0 else 0.0,
+            "p50Ms": round(self.percentile(50) * 1000, 2),
+            "p95Ms": round(self.percentile(95) * 1000, 2),
+            "p99Ms": round(self.percentile(99) * 1000, 2),
+            "maxMs": round(max(self.latencies, default=0.0) * 1000, 2)
+        }
+
+
+async def timed_request(
+    client: httpx.AsyncClient, recorder: LatencyRecorder, method: str, url: str, **kwargs
+) -> Optional[httpx.Response]:
+    """요청 하나를 보내고 지연 시간 기록 (연결 오류는 None)"""
+    started = time.perf_counter()
+    try:
+        response = await client.request(method, url, **kwargs)
+    except httpx.HTTPError:
+        recorder.record(time.perf_counter() - started, None)
+        return None
+    recorder.record(time.perf_counter() - started, response.status_code)
+    return response
+
+
+async def build_timetable(client: httpx.AsyncClient, recorder: LatencyRecorder, courses_csv: bytes) -> None:
+    """CSV 업로드로 시간표 생성 (생성 캐시를 건너뛰고 항상 유전 알고리즘 실행)"""
+    response = await timed_request(
+        client, recorder, "POST", "/api/schedule/build", params={"reoptimize": "true"},
+        files={"file": ("loadtest.csv", courses_csv, "text/csv")}
+    )
+    if response is None or response.status_code != 200:
+        detail = response.text if response is not None else "연결 오류"
+        raise RuntimeError(f"시간표 생성 실패: {detail}")
+
+
+async def scenario_reads_during_build(client: httpx.AsyncClient, options) -> List[LatencyRecorder]:
+    """시간표 생성(유전 알고리즘) 중 동시 시간표 조회"""
+    await build_timetable(client, LatencyRecorder("warmup"), generate_courses_csv(options.courses // 4 or 1, options.seed))
+
+    build = LatencyRecorder("POST /api/schedule/build")
+    reads = LatencyRecorder("GET /api/schedule (생성 중)")
+    build_task = asyncio.create_task(build_timetable(client, build, generate_courses_csv(options.courses, options.seed)))
+
+    async def reader():
+        while not build_task.done():
+            await timed_request(client, reads, "GET", "/api/schedule")
+
+    await asyncio.gather(*(reader() for _ in range(options.concurrency)))
+    await build_task
+    build.finish()
+    reads.finish()
+    return [build, reads]
+
+
+async def scenario_course_add_burst(client: httpx.AsyncClient, options) -> List[LatencyRecorder]:
+    """강의 추가 요청 폭주 (재배정 대기열 병합) 후 재배정 완료까지 대기"""
+    await build_timetable(client, LatencyRecorder("warmup"), generate_courses_csv(options.courses, options.seed))
+
+    adds = LatencyRecorder("POST /api/courses/add?wait=false")
+    drain = LatencyRecorder("재배정 완료 대기")
+    semaphore = asyncio.Semaphore(options.concurrency)
+    tickets: List[int] = []
+
+    async def add(index: int):
+        async with semaphore:
+            response = await timed_request(
+                client, adds, "POST", "/api/courses/add", params={"wait": "false"}, json=course_add_payload(index)
+            )
+            if response is not None and response.status_code in (200, 202):
+                ticket = response.json().get("ticket")
+                if ticket is not None:
+                    tickets.append(ticket)
+
+    await asyncio.gather(*(add(i) for i in range(options.adds)))
+    adds.finish()
+
+    # 마지막 티켓이 끝나면 앞선 요청도 모두 반영된 상태
+    if tickets:
+        last = max(tickets)
+        while True:
+            response = await timed_request(client, drain, "GET", f"/api/reschedule/{last}", params={"timeout": 30})
+            if response is None or response.status_code != 200 or response.json()["status"] != "pending":
+                break
+    drain.finish()
+    return [adds, drain]
+
+
+async def seed_versions(client: httpx.AsyncClient, count: int, concurrency: int) -> None:
+    """
+    활성 버전 복원을 count번 요청해 버전 이력 생성 (API로 기록하므로 --url 서버에도 적용)
+
+    복원은 유전 알고리즘 없이 현재 시간표를 새 버전으로 저장합니다.
+    """
+    response = await client.get("/api/versions", params={"limit": 1})
+    response.raise_for_status()
+    version_id = response.json()["versions"][0]["id"]
+    semaphore = asyncio.Semaphore(concurrency)
+    failures = []
+
+    async def restore():
+        async with semaphore:
+            response = await client.post(f"/api/versions/{version_id}/restore")
+            if response.status_code != 200:
+                failures.append(response.text)
+
+    await asyncio.gather(*(restore() for _ in range(count)))
+    if failures:
+        raise RuntimeError(f"버전 생성 실패 {len(failures)}건: {failures[0]}")
+
+
+async def scenario_version_listing(client: httpx.AsyncClient, options) -> List[LatencyRecorder]:
+    """버전이 수천 개인 파티션의 버전 목록 조회 (첫 페이지와 커서 페이지)"""
+    await build_timetable(client, LatencyRecorder("warmup"), generate_courses_csv(options.courses // 4 or 1, options.seed))
+    seeding = time.perf_counter()
+    await seed_versions(client, options.versions, options.concurrency)
+    print(f"  버전 {options.versions}개 준비: {time.perf_counter() - seeding:.1f}초")
+
+    first_pages = LatencyRecorder("GET /api/versions (첫 페이지)")
+    next_pages = LatencyRecorder("GET /api/versions (커서 페이지)")
+    deadline = time.perf_counter() + options.duration
+
+    async def browser(worker: int):
+        rng = random.Random(options.seed + worker)
+        while time.perf_counter() < deadline:
+            response = await timed_request(client, first_pages, "GET", "/api/versions", params={"limit": 50})
+            pages = rng.randint(1, 10)
+            while response is not None and response.status_code == 200 and pages > 0:
+                cursor = response.json().get("nextCursor")
+                if cursor is None:
+                    break
+                response = await timed_request(
+                    client, next_pages, "GET", "/api/versions", params={"limit": 50, "cursor": cursor}
+                )
+                pages -= 1
+
+    await asyncio.gather(*(browser(i) for i in range(options.concurrency)))
+    first_pages.finish()
+    next_pages.finish()
+    return [first_pages, next_pages]
+
+
+async def scenario_vacancy_polling(client: httpx.AsyncClient, options) -> List[LatencyRecorder]:
+    """공실 분석 주기적 조회 (ETag 재검증 포함)"""
+    await build_timetable(client, LatencyRecorder("warmup"), generate_courses_csv(options.courses, options.seed))
+
+    polls = LatencyRecorder("GET /api/vacancy")
+    deadline = time.perf_counter() + options.duration
+
+    async def poller():
+        etag = None
+        while time.perf_counter() < deadline:
+            headers = {"If-None-Match": etag} if etag else {}
+            response = await timed_request(client, polls, "GET", "/api/vacancy", headers=headers)
+            if response is not None and response.status_code == 200:
+                etag = response.headers.get("etag")
+
+    await asyncio.gather(*(poller() for _ in range(options.concurrency)))
+    polls.finish()
+    return [polls]
+
+
+SCENARIOS: Dict[str, Callable[[httpx.AsyncClient, argparse.Namespace], Awaitable[List[LatencyRecorder]]]] = {
+    "reads_during_build": scenario_reads_during_build,
+    "course_add_burst": scenario_course_add_burst,
+    "version_listing": scenario_version_listing,
+    "vacancy_polling": scenario_vacancy_polling,
+}
+
+
+def print_results(name: str, recorders: List[LatencyRecorder]) -> None:
+    """시나리오 결과 표 출력"""
+    print(f"\n[{name}]")
+    print(f"  {'요청':<36}{'건수':>8}{'오류':>6}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for recorder in recorders:
+        result = recorder.to_dict()
+        print(
+            f"  {result['name']:<36}{result['requests']:>8}{result['errors']:>6}{result['throughput']:>10.1f}"
+            f"{result['p50Ms']:>10.1f}{result['p95Ms']:>10.1f}{result['p99Ms']:>10.1f}{result['maxMs']:>10.1f}"
+        )
+
+
+async def run_scenarios(client: httpx.AsyncClient, options) -> Dict[str, List[Dict]]:
+    """선택한 시나리오를 시나리오마다 새 학기 파티션에서 순서대로 실행"""
+    results = {}
+    for name in options.scenario or list(SCENARIOS):
+        client.params = {"tenant": options.tenant, "semester": name}
+        recorders = await SCENARIOS[name](client, options)
+        print_results(name, recorders)
+        results[name] = [recorder.to_dict() for recorder in recorders]
+    return results
+
+
+async def main(options) -> Dict[str, List[Dict]]:
+    """프로세스 내(ASGI) 또는 --url 서버 대상으로 부하 테스트 실행"""
+    timeout = httpx.Timeout(REQUEST_TIMEOUT_SECONDS)
+    limits = httpx.Limits(max_connections=options.concurrency + 4)
+    if options.url:
+        async with httpx.AsyncClient(base_url=options.url, timeout=timeout, limits=limits) as client:
+            return await run_scenarios(client, options)
+
+    with tempfile.TemporaryDirectory(prefix="timetable-loadtest-", ignore_cleanup_errors=True) as directory:
+        # models/api를 가져오기 전에 데이터베이스 지정 (기본은 실행마다 새 임시 파일)
+        os.environ["TIMETABLE_DATABASE_URL"] = options.database_url or f"sqlite:///{os.path.join(directory, 'loadtest.db')}"
+        os.environ.pop("TIMETABLE_ASYNC_DATABASE_URL", None)
+
+        import scheduler
+        if options.generations:
+            scheduler.MAX_GENERATIONS = options.generations
+        if options.population:
+            scheduler.POPULATION_SIZE = options.population
+        from api import app
+
+        transport = httpx.ASGITransport(app=app)
+        async with app.router.lifespan_context(app):
+            async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=timeout) as client:
+                return await run_scenarios(client, options)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """명령행 인자"""
+    parser = argparse.ArgumentParser(description="시간표 API 부하 테스트")
+    parser.add_argument("--url", help="대상 서버 (예: http://127.0.0.1:8000, 생략하면 프로세스 내 실행)")
+    parser.add_argument(
+        "--database-url",
+        help="프로세스 내 실행에 사용할 데이터베이스 URL (생략하면 임시 SQLite 파일, 예: sqlite:///./timetable.db)"
+    )
+    parser.add_argument("--scenario", action="append", choices=list(SCENARIOS), help="실행할 시나리오 (반복 지정 가능, 기본 전체)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="동시 클라이언트 수")
+    parser.add_argument("--duration", type=float, default=DEFAULT_DURATION_SECONDS, help="조회 시나리오 실행 시간(초)")
+    parser.add_argument("--courses", type=int, default=DEFAULT_COURSES, help="생성할 교과목 수")
+    parser.add_argument("--versions", type=int, default=DEFAULT_VERSIONS, help="version_listing 시나리오의 버전 수")
+    parser.add_argument("--adds", type=int, default=DEFAULT_COURSE_ADDS, help="course_add_burst 시나리오의 강의 추가 요청 수")
+    parser.add_argument("--generations", type=int, help="유전 알고리즘 세대 수 (프로세스 내 실행에서만 적용)")
+    parser.add_argument("--population", type=int, help="유전 알고리즘 개체 수 (프로세스 내 실행에서만 적용)")
+    parser.add_argument("--seed", type=int, default=0, help="CSV 생성 시드")
+    parser.add_argument("--tenant", default=f"loadtest-{int(time.time())}", help="요청에 사용할 테넌트")
+    parser.add_argument("--json", help="결과를 저장할 JSON 파일")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    options = parse_args()
+    results = asyncio.run(main(options))
+    if options.json:
+        with open(options.json, "w", encoding="utf-8") as f:
+            json.dump({"options": vars(options), "results": results}, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,290 @@
+"""
+프로세스 내 서비스 지표 (Prometheus 텍스트 형식)
+
+카운터, 게이지, 히스토그램을 메모리에 모아 /metrics에서 텍스트 형식으로 내보냅니다.
+외부 서비스나 라이브러리 없이 동작하며, 기록은 잠금 한 번과 덧셈 몇 번으로 끝납니다.
+HTTP 요청 시간(라우트별), 유전 알고리즘 실행, SQL 실행, 캐시 적중, 재배정 대기열, 이력 정리 결과를 수집합니다.
+"""
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+# 히스토그램 구간 (초)
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+GA_BUCKETS = (0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    """레이블 값 이스케이프 (역슬래시, 큰따옴표, 줄바꿈)"""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    """{name="value",...} 형식의 레이블 문자열"""
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    """지표 값 문자열"""
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    """지표 공통 (이름, 설명, 레이블 이름)"""
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        """HELP/TYPE 줄과 샘플"""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """증가만 하는 카운터"""
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        """레이블 값 순서대로 지정하여 증가"""
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def get(self, *labels: str) -> float:
+        """현재 값"""
+        return self._values.get(labels, 0.0)
+
+    def snapshot(self) -> Dict[LabelValues, float]:
+        """레이블 값별 현재 값 사본"""
+        with self._lock:
+            return dict(self._values)
+
+    def _samples(self) -> List[str]:
+        items = sorted(self.snapshot().items())
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}" for labels, value in items]
+
+
+class Gauge(_Metric):
+    """현재 값 게이지 (collect를 지정하면 내보낼 때마다 호출하여 {레이블 값: 값}을 얻음)"""
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        collect: Optional[Callable[[], Dict[LabelValues, float]]] = None
+    ):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._collect = collect
+
+    def set(self, value: float, *labels: str) -> None:
+        """값 지정"""
+        with self._lock:
+            self._values[labels] = value
+
+    def _samples(self) -> List[str]:
+        if self._collect is not None:
+            values = self._collect()
+        else:
+            with self._lock:
+                values = dict(self._values)
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in sorted(values.items())
+        ]
+
+
+class Histogram(_Metric):
+    """구간별 관측 수와 합계 (구간 경계는 이하 기준)"""
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = REQUEST_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        self._counts: Dict[LabelValues, List[int]] = {}  # 구간별 관측 수 (마지막은 +Inf)
+        self._sums: Dict[LabelValues, float] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        """관측값 기록"""
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.get(labels)
+            if counts is None:
+                counts = self._counts[labels] = [0] * (len(self.buckets) + 1)
+                self._sums[labels] = 0.0
+            counts[index] += 1
+            self._sums[labels] += value
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((labels, list(counts), self._sums[labels]) for labels, counts in self._counts.items())
+        lines = []
+        for labels, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+REGISTRY: List[_Metric] = []
+
+
+def render_metrics() -> str:
+    """등록된 모든 지표를 Prometheus 텍스트 형식으로 변환"""
+    return "\n".join(metric.render() for metric in REGISTRY) + "\n"
+
+
+# HTTP 요청
+REQUEST_SECONDS = Histogram(
+    "timetable_http_request_duration_seconds",
+    "HTTP 요청 처리 시간 (응답 본문 전송 완료까지)",
+    ("method", "route", "status"),
+    REQUEST_BUCKETS
+)
+
+# 유전 알고리즘
+GA_RUN_SECONDS = Histogram("timetable_ga_run_duration_seconds", "유전 알고리즘 실행 시간", buckets=GA_BUCKETS)
+GA_GENERATIONS = Counter("timetable_ga_generations_total", "실행된 유전 알고리즘 세대 수")
+GA_LAST_GENERATIONS = Gauge("timetable_ga_last_generations", "마지막 유전 알고리즘 실행의 세대 수")
+GA_LAST_FITNESS = Gauge("timetable_ga_last_fitness", "마지막 유전 알고리즘 실행 종료 시 최고 적합도")
+GA_LAST_COURSES = Gauge("timetable_ga_last_courses", "마지막 유전 알고리즘 실행의 배정 대상 강의 수")
+
+# SQL
+QUERY_SECONDS = Histogram(
+    "timetable_db_query_duration_seconds",
+    "SQL 실행 시간 (엔진, 구문 종류별)",
+    ("engine", "statement"),
+    QUERY_BUCKETS
+)
+
+# 이력 정리
+COMPACTION_RUNS = Counter(
+    "timetable_compaction_runs_total", "버전 이력 정리 실행 수 (실행 방식, 결과별)", ("trigger", "result")
+)
+
+# 캐시
+CACHE_REQUESTS = Counter("timetable_cache_requests_total", "캐시 조회 수", ("cache", "result"))
+
+
+def _cache_hit_ratios() -> Dict[LabelValues, float]:
+    """캐시별 적중률 (조회가 없으면 생략)"""
+    counts = CACHE_REQUESTS.snapshot()
+    ratios = {}
+    for cache in {labels[0] for labels in counts}:
+        hits = counts.get((cache, "hit"), 0.0)
+        total = hits + counts.get((cache, "miss"), 0.0)
+        if total:
+            ratios[(cache,)] = hits / total
+    return ratios
+
+
+CACHE_HIT_RATIO = Gauge("timetable_cache_hit_ratio", "캐시 적중률 (프로세스 시작 이후)", ("cache",), collect=_cache_hit_ratios)
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    """캐시 조회 결과 기록"""
+    CACHE_REQUESTS.inc(cache, "hit" if hit else "miss")
+
+
+def record_compaction(trigger: str, success: bool) -> None:
+    """이력 정리 실행 결과 기록 (trigger: scheduled 또는 manual)"""
+    COMPACTION_RUNS.inc(trigger, "success" if success else "failure")
+
+
+def record_ga_run(seconds: float, generations: int, fitness: Optional[float], courses: int) -> None:
+    """유전 알고리즘 실행 결과 기록"""
+    GA_RUN_SECONDS.observe(seconds)
+    GA_GENERATIONS.inc(amount=generations)
+    GA_LAST_GENERATIONS.set(generations)
+    GA_LAST_COURSES.set(courses)
+    if fitness is not None:
+        GA_LAST_FITNESS.set(fitness)
+
+
+def _statement_kind(statement: str) -> str:
+    """SQL 구문 종류 (SELECT, INSERT, UPDATE, DELETE, 그 외 OTHER)"""
+    keyword = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+    if keyword == "WITH":
+        return "SELECT"
+    return keyword if keyword in ("SELECT", "INSERT", "UPDATE", "DELETE") else "OTHER"
+
+
+def instrument_engine(engine: Engine, label: str) -> None:
+    """엔진의 모든 SQL 실행 시간을 기록 (비동기 엔진은 sync_engine 전달)"""
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["metrics_query_start"].pop()
+        QUERY_SECONDS.observe(time.perf_counter() - started, label, _statement_kind(statement))
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        # 실패한 구문은 after_cursor_execute가 호출되지 않으므로 시작 시간만 제거
+        if context.connection is not None and context.connection.info.get("metrics_query_start"):
+            context.connection.info["metrics_query_start"].pop()
+
+
+class MetricsMiddleware:
+    """요청 처리 시간을 라우트 템플릿별로 기록하는 ASGI 미들웨어 (스트리밍 응답은 전송 완료까지)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        root_path = scope.get("root_path", "")
+        status = [500]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # 라우트 템플릿 (/api/versions/{version_id} 등), 마운트된 앱은 마운트 경로
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or scope.get("root_path", "")[len(root_path):] or "unmatched"
+            REQUEST_SECONDS.observe(time.perf_counter() - started, scope["method"], route_path, str(status[0]))
@@ -0,0 +1,274 @@
+"""
+데이터베이스 스키마 마이그레이션
+
+schema_migrations 테이블에 적용된 버전을 기록하고, 아직 적용되지 않은 단계만 실행합니다.
+각 단계는 그 시점의 테이블/컬럼 정의를 직접 가지고 있어, 이후 모델이 바뀌어도 자기 단계의 변경만 적용합니다.
+"""
+from datetime import datetime
+from typing import Callable, List, Tuple
+from sqlalchemy import (
+    Boolean, Column, DateTime, Float, ForeignKey, Index, Integer, MetaData, String, Table, Text, inspect, text
+)
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.schema import CreateColumn
+
+
+def _add_columns(connection: Connection, table_name: str, *columns: Column) -> None:
+    """기존 테이블에 없는 컬럼 추가 (server_default가 있는 컬럼은 기존 행도 기본값으로 채워짐)"""
+    table = Table(table_name, MetaData(), *columns)
+    existing = {column["name"] for column in inspect(connection).get_columns(table_name)}
+    preparer = connection.dialect.identifier_preparer
+    for column in table.columns:
+        if column.name in existing:
+            continue
+        column_spec = CreateColumn(column).compile(dialect=connection.dialect)
+        connection.execute(text(f"ALTER TABLE {preparer.format_table(table)} ADD COLUMN {column_spec}"))
+
+
+def _create_index(connection: Connection, name: str, table_name: str, *column_names: str, unique: bool = False) -> None:
+    """인덱스 생성 (이미 있으면 건너뜀)"""
+    table = Table(table_name, MetaData(), *(Column(column_name) for column_name in column_names))
+    Index(name, *table.columns, unique=unique).create(bind=connection, checkfirst=True)
+
+
+def _schedule_columns() -> List[Column]:
+    """schedules/schedule_history 공통 배정 컬럼"""
+    return [
+        Column("course_id", Integer),
+        Column("course_code", String),
+        Column("course_name", String),
+        Column("instructor", String),
+        Column("department", String),
+        Column("day", String),
+        Column("start_time", String),
+        Column("end_time", String),
+        Column("room", String),
+        Column("is_lab", Boolean),
+        Column("enrollment", Integer),
+        Column("weeks", Integer),
+        Column("credits", Integer),
+    ]
+
+
+def _create_base_tables(connection: Connection) -> None:
+    """기본 테이블 생성 (강의, 버전, 시간표, 시간표 이력)"""
+    metadata = MetaData()
+    Table(
+        "courses", metadata,
+        Column("id", Integer, primary_key=True, index=True),
+        Column("process", String),
+        Column("department", String),
+        Column("course_code", String),
+        Column("course_name", String),
+        Column("grade", Integer),
+        Column("area", String),
+        Column("enrollment", Integer),
+        Column("main_instructor", String),
+        Column("instructor", String),
+        Column("weeks", Integer),
+        Column("credits", Integer),
+        Column("is_lab", Boolean),
+        Column("is_deleted", Boolean),
+        Column("created_at", DateTime),
+        Column("updated_at", DateTime),
+    )
+    Table(
+        "timetable_versions", metadata,
+        Column("id", Integer, primary_key=True, index=True),
+        Column("version_number", Integer, unique=True, index=True),
+        Column("created_at", DateTime),
+        Column("description", String),
+        Column("is_active", Boolean),
+    )
+    Table("schedules", metadata, Column("id", Integer, primary_key=True, index=True), *_schedule_columns())
+    Table(
+        "schedule_history", metadata,
+        Column("id", Integer, primary_key=True, index=True),
+        Column("version_id", Integer, ForeignKey("timetable_versions.id"), index=True),
+        *_schedule_columns()
+    )
+    metadata.create_all(bind=connection)
+
+
+def _add_version_delta_columns(connection: Connection) -> None:
+    """버전 델타/메타데이터 컬럼, 공실 분석 테이블, 조회 인덱스 추가"""
+    _add_columns(
+        connection, "timetable_versions",
+        Column("parent_id", Integer),
+        Column("snapshot_id", Integer),
+        Column("delta_depth", Integer),
+        Column("course_count", Integer),
+        Column("rooms_used", String),
+        Column("utilization_rate", Float),
+    )
+    _add_columns(connection, "schedule_history", Column("is_removed", Boolean))
+
+    metadata = MetaData()
+    Table("timetable_versions", metadata, Column("id", Integer, primary_key=True))  # 외래 키 대상 (생성하지 않음)
+    vacancy_analyses = Table(
+        "vacancy_analyses", metadata,
+        Column("version_id", Integer, ForeignKey("timetable_versions.id"), primary_key=True),
+        Column("result", Text),
+    )
+    vacancy_analyses.create(bind=connection, checkfirst=True)
+
+    _create_index(connection, "ix_courses_is_deleted_id", "courses", "is_deleted", "id")
+    _create_index(connection, "ix_timetable_versions_is_active", "timetable_versions", "is_active")
+    _create_index(connection, "ix_timetable_versions_snapshot_id", "timetable_versions", "snapshot_id")
+    _create_index(connection, "ix_schedules_room_day", "schedules", "room", "day")
+    _create_index(connection, "ix_schedules_instructor_day", "schedules", "instructor", "day")
+
+
+def _version_records(connection: Connection, version_id: int) -> list:
+    """버전의 전체 배정 복원 (스냅샷부터 델타 순서대로 적용, 마이그레이션 시점의 컬럼만 사용)"""
+    # models가 이 모듈을 가져오므로 함수 안에서 가져옴
+    from models import ScheduleRecord
+
+    chain = []
+    current = version_id
+    while current is not None:
+        chain.append(current)
+        parent_id, delta_depth = connection.execute(
+            text("SELECT parent_id, delta_depth FROM timetable_versions WHERE id = :id"), {"id": current}
+        ).one()
+        current = parent_id if delta_depth else None
+
+    columns = ", ".join(ScheduleRecord._fields)
+    records = {}
+    for chain_id in reversed(chain):
+        rows = connection.execute(
+            text(f"SELECT is_removed, {columns} FROM schedule_history WHERE version_id = :id ORDER BY id"),
+            {"id": chain_id}
+        )
+        for row in rows:
+            if row.is_removed:
+                records.pop(row.course_id, None)
+            else:
+                records[row.course_id] = ScheduleRecord(*row[1:])
+    return list(records.values())
+
+
+def _backfill_version_metadata(connection: Connection) -> None:
+    """델타 인코딩 이전 버전을 전체 스냅샷으로 표시하고 과목 수, 사용 강의실, 활용률 채우기"""
+    from vacancy_analyzer import analyze_schedules
+    from version_history import compute_version_metadata
+
+    connection.execute(text(
+        "UPDATE timetable_versions SET snapshot_id = id, delta_depth = 0 "
+        "WHERE snapshot_id IS NULL"
+    ))
+    connection.execute(text("UPDATE schedule_history SET is_removed = :false WHERE is_removed IS NULL"), {"false": False})
+    version_ids = connection.execute(text(
+        "SELECT id FROM timetable_versions "
+        "WHERE course_count IS NULL OR rooms_used IS NULL OR utilization_rate IS NULL ORDER BY id"
+    )).scalars().all()
+    for version_id in version_ids:
+        records = _version_records(connection, version_id)
+        connection.execute(
+            text(
+                "UPDATE timetable_versions SET course_count = :course_count, rooms_used = :rooms_used, "
+                "utilization_rate = :utilization_rate WHERE id = :id"
+            ),
+            {"id": version_id, **compute_version_metadata(records, analyze_schedules(records))}
+        )
+
+
+# 파티션 키를 앞에 둔 인덱스로 대체된 전역 인덱스
+REPLACED_BY_PARTITION_INDEXES = [
+    "ix_courses_is_deleted_id",
+    "ix_timetable_versions_version_number",  # 전역 UNIQUE (버전 번호는 파티션별로 매김)
+    "ix_timetable_versions_is_active",
+    "ix_schedules_room_day",
+    "ix_schedules_instructor_day",
+]
+
+
+def _add_history_course_index(connection: Connection) -> None:
+    """버전 비교용 이력 인덱스 추가 (버전별 과목 행 조회)"""
+    _create_index(connection, "ix_schedule_history_version_course", "schedule_history", "version_id", "course_id")
+
+
+def _add_version_tag(connection: Connection) -> None:
+    """버전 보존 태그 컬럼 추가"""
+    _add_columns(connection, "timetable_versions", Column("tag", String, nullable=True))
+    _create_index(connection, "ix_timetable_versions_tag", "timetable_versions", "tag")
+
+
+def _add_partition_keys(connection: Connection) -> None:
+    """파티션 키(tenant, semester) 컬럼 추가 (기존 데이터는 기본 파티션) 및 인덱스 교체"""
+    for index_name in REPLACED_BY_PARTITION_INDEXES:
+        connection.execute(text(f"DROP INDEX IF EXISTS {index_name}"))
+    for table_name in ("courses", "timetable_versions", "schedules"):
+        _add_columns(
+            connection, table_name,
+            Column("tenant", String, nullable=False, server_default="default"),
+            Column("semester", String, nullable=False, server_default="default"),
+        )
+    _create_index(connection, "ix_courses_partition_deleted_id", "courses", "tenant", "semester", "is_deleted", "id")
+    _create_index(
+        connection, "ix_timetable_versions_partition_number",
+        "timetable_versions", "tenant", "semester", "version_number", unique=True
+    )
+    _create_index(connection, "ix_timetable_versions_partition_active", "timetable_versions", "tenant", "semester", "is_active")
+    _create_index(connection, "ix_schedules_partition_id", "schedules", "tenant", "semester", "id")
+    _create_index(connection, "ix_schedules_partition_room_day", "schedules", "tenant", "semester", "room", "day")
+    _create_index(
+        connection, "ix_schedules_partition_instructor_day", "schedules", "tenant", "semester", "instructor", "day"
+    )
+
+
+def _create_build_cache_table(connection: Connection) -> None:
+    """시간표 생성 캐시 테이블 생성"""
+    build_cache = Table(
+        "build_cache", MetaData(),
+        Column("cache_key", String, primary_key=True),
+        Column("course_count", Integer),
+        Column("assignments", Text),
+        Column("fitness", Float, nullable=True),
+        Column("created_at", DateTime),
+        Column("last_used_at", DateTime, index=True),
+        Column("hits", Integer),
+    )
+    build_cache.create(bind=connection, checkfirst=True)
+
+
+# (버전, 설명, 실행 함수)
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "기본 테이블 생성", _create_base_tables),
+    (2, "버전 델타/메타데이터 컬럼 및 조회 인덱스 추가", _add_version_delta_columns),
+    (3, "기존 버전 메타데이터 채우기", _backfill_version_metadata),
+    (4, "버전 비교용 이력 인덱스 추가", _add_history_course_index),
+    (5, "버전 보존 태그 컬럼 추가", _add_version_tag),
+    (6, "테넌트/학기 파티션 키 추가", _add_partition_keys),
+    (7, "시간표 생성 캐시 테이블 추가", _create_build_cache_table),
+]
+
+
+def _ensure_migration_table(connection: Connection) -> None:
+    """schema_migrations 테이블 생성"""
+    connection.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        "version INTEGER PRIMARY KEY, description VARCHAR, applied_at VARCHAR)"
+    ))
+
+
+def get_schema_version(connection: Connection) -> int:
+    """적용된 최신 마이그레이션 버전"""
+    return connection.execute(text("SELECT COALESCE(MAX(version), 0) FROM schema_migrations")).scalar()
+
+
+def upgrade_schema(engine: Engine) -> int:
+    """적용되지 않은 마이그레이션 실행 후 현재 스키마 버전 반환"""
+    with engine.begin() as connection:
+        _ensure_migration_table(connection)
+        current = get_schema_version(connection)
+        for version, description, migrate in MIGRATIONS:
+            if version <= current:
+                continue
+            migrate(connection)
+            connection.execute(
+                text("INSERT INTO schema_migrations (version, description, applied_at) VALUES (:v, :d, :t)"),
+                {"v": version, "d": description, "t": datetime.utcnow().isoformat()}
+            )
+            current = version
+    return current
@@ -1,16 +1,46 @@
 """
 데이터베이스 모델 및 데이터 클래스 정의
 """
-from sqlalchemy import create_engine, Column, Integer, String, Boolean, Float, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, Float, DateTime, ForeignKey, Text, Index, and_
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from typing import List, Optional
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from storage import create_configured_engine, create_configured_async_engine, get_database_url
+from migrations import upgrade_schema
+from metrics import instrument_engine
+from sql_profiler import SQL_PROFILE_ENABLED, install_sql_profiler
+from typing import List, Optional, NamedTuple
 from datetime import time, datetime
 from pydantic import BaseModel
 
 Base = declarative_base()
 
-class Course(Base):
+# 파티션 키 기본값 (파티션을 지정하지 않은 요청과 기존 데이터)
+DEFAULT_TENANT = "default"
+DEFAULT_SEMESTER = "default"
+
+
+class Partition(NamedTuple):
+    """시간표 파티션 (테넌트/학기)"""
+    tenant: str = DEFAULT_TENANT
+    semester: str = DEFAULT_SEMESTER
+
+
+DEFAULT_PARTITION = Partition()
+
+
+class PartitionMixin:
+    """파티션 키 컬럼 (강의, 시간표, 버전은 파티션별로 독립)"""
+    tenant = Column(String, nullable=False, default=DEFAULT_TENANT, server_default=DEFAULT_TENANT)  # 테넌트 (학과/기관)
+    semester = Column(String, nullable=False, default=DEFAULT_SEMESTER, server_default=DEFAULT_SEMESTER)  # 학기
+    
+    @classmethod
+    def in_partition(cls, partition: Partition):
+        """파티션 조건식"""
+        return and_(cls.tenant == partition.tenant, cls.semester == partition.semester)
+
+
+class Course(PartitionMixin, Base):
     """교과목 테이블"""
     __tablename__ = "courses"
     
@@ -30,21 +60,37 @@ class Course(Base):
     is_deleted = Column(Boolean, default=False)  # 논리적 삭제 여부
     created_at = Column(DateTime, default=datetime.utcnow)  # 생성 시간
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)  # 수정 시간
+    
+    __table_args__ = (
+        Index("ix_courses_partition_deleted_id", "tenant", "semester", "is_deleted", "id"),  # 활성 강의 목록 조회
+    )
 
 
-class TimetableVersion(Base):
-    """시간표 버전 테이블"""
+class TimetableVersion(PartitionMixin, Base):
+    """시간표 버전 테이블 (버전 번호는 파티션별로 매김)"""
     __tablename__ = "timetable_versions"
     
     id = Column(Integer, primary_key=True, index=True)
-    version_number = Column(Integer, unique=True, index=True)  # 버전 번호
+    version_number = Column(Integer)  # 버전 번호
     created_at = Column(DateTime, default=datetime.utcnow)  # 생성 시간
     description = Column(String)  # 버전 설명
     is_active = Column(Boolean, default=False)  # 현재 활성 버전 여부
+    parent_id = Column(Integer, ForeignKey("timetable_versions.id"), nullable=True)  # 델타 기준 버전
+    snapshot_id = Column(Integer, index=True)  # 가장 가까운 전체 스냅샷 버전
+    delta_depth = Column(Integer, default=0)  # 스냅샷으로부터의 델타 단계 (0 = 전체 스냅샷)
+    course_count = Column(Integer, default=0)  # 해당 버전의 배정 과목 수
+    rooms_used = Column(String, default="")  # 사용 강의실 목록 (쉼표 구분)
+    utilization_rate = Column(Float, default=0.0)  # 전체 활용률
+    tag = Column(String, nullable=True, index=True)  # 보존 태그 (태그된 버전은 정리 대상에서 제외)
+    
+    __table_args__ = (
+        Index("ix_timetable_versions_partition_number", "tenant", "semester", "version_number", unique=True),  # 버전 목록/다음 번호
+        Index("ix_timetable_versions_partition_active", "tenant", "semester", "is_active"),  # 활성 버전 조회
+    )
 
 
-class Schedule(Base):
-    """시간표 테이블 (현재 버전)"""
+class Schedule(PartitionMixin, Base):
+    """시간표 테이블 (파티션별 현재 버전)"""
     __tablename__ = "schedules"
     
     id = Column(Integer, primary_key=True, index=True)
@@ -61,10 +107,16 @@ class Schedule(Base):
     enrollment = Column(Integer)
     weeks = Column(Integer)
     credits = Column(Integer)
+    
+    __table_args__ = (
+        Index("ix_schedules_partition_id", "tenant", "semester", "id"),  # 파티션 시간표 조회 (커서 페이지네이션)
+        Index("ix_schedules_partition_room_day", "tenant", "semester", "room", "day"),  # 강의실별 조회
+        Index("ix_schedules_partition_instructor_day", "tenant", "semester", "instructor", "day"),  # 교수별 조회
+    )
 
 
 class ScheduleHistory(Base):
-    """시간표 이력 테이블"""
+    """시간표 이력 테이블 (스냅샷 버전은 전체 배정, 델타 버전은 부모 대비 변경분만 저장, 파티션은 버전으로 결정)"""
     __tablename__ = "schedule_history"
     
     id = Column(Integer, primary_key=True, index=True)
@@ -82,17 +134,77 @@ class ScheduleHistory(Base):
     enrollment = Column(Integer)
     weeks = Column(Integer)
     credits = Column(Integer)
+    is_removed = Column(Boolean, default=False)  # 델타: 부모 버전 대비 삭제된 배정
+    
+    __table_args__ = (
+        Index("ix_schedule_history_version_course", "version_id", "course_id"),  # 버전 비교 (과목별 최신 행)
+    )
+
+
+class VacancyAnalysis(Base):
+    """버전별 공실 분석 결과 테이블 (버전 저장 시 한 번 계산, 파티션은 버전으로 결정)"""
+    __tablename__ = "vacancy_analyses"
+    
+    version_id = Column(Integer, ForeignKey("timetable_versions.id"), primary_key=True)  # 버전 참조
+    result = Column(Text)  # VacancyResponse JSON
+
+
+class BuildCacheEntry(Base):
+    """CSV 시간표 생성 결과 캐시 (정규화된 강의 목록 + 유전 알고리즘 파라미터의 해시로 조회, 파티션 간 공유)"""
+    __tablename__ = "build_cache"
+    
+    cache_key = Column(String, primary_key=True)  # SHA-256 (강의 목록 해시 + 파라미터)
+    course_count = Column(Integer)  # 강의 수
+    assignments = Column(Text)  # [[정규화 순서의 강의 번호, 요일, 시작, 종료, 강의실], ...] JSON
+    fitness = Column(Float, nullable=True)  # 최고 적합도
+    created_at = Column(DateTime, default=datetime.utcnow)
+    last_used_at = Column(DateTime, default=datetime.utcnow, index=True)  # 최근 사용 (오래된 항목부터 정리)
+    hits = Column(Integer, default=0)  # 캐시 적중 수
+
+
+class ScheduleRecord(NamedTuple):
+    """시간표 배정 레코드 (버전 복원 결과, 불변)"""
+    course_id: int
+    course_code: str
+    course_name: str
+    instructor: str
+    department: str
+    day: str
+    start_time: str
+    end_time: str
+    room: str
+    is_lab: bool
+    enrollment: int
+    weeks: int
+    credits: int
 
 
-# SQLite 데이터베이스 초기화
-DATABASE_URL = "sqlite:///./timetable.db"
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+# 데이터베이스 엔진 (storage.py 설정 적용, 기본 SQLite)
+DATABASE_URL = get_database_url()
+engine = create_configured_engine(DATABASE_URL)
+instrument_engine(engine, "sync")
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# 비동기 엔진 (조회 API용, SQLite는 aiosqlite)
+async_engine = create_configured_async_engine()
+instrument_engine(async_engine.sync_engine, "async")
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+# 요청별 SQL 프로파일러 (TIMETABLE_SQL_PROFILE=1일 때만 이벤트 등록)
+if SQL_PROFILE_ENABLED:
+    install_sql_profiler(engine)
+    install_sql_profiler(async_engine.sync_engine)
+
+
+_schema_version: Optional[int] = None
 
-def init_db():
-    """데이터베이스 테이블 생성"""
-    Base.metadata.create_all(bind=engine)
+
+def init_db() -> int:
+    """데이터베이스 스키마 마이그레이션 (적용된 스키마 버전 반환, 프로세스당 한 번만 확인)"""
+    global _schema_version
+    if _schema_version is None:
+        _schema_version = upgrade_schema(engine)
+    return _schema_version
 
 
 def get_db():
@@ -104,6 +216,12 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    """비동기 데이터베이스 세션 생성"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 # Pydantic 모델 (API 요청/응답)
 class CourseResponse(BaseModel):
     """교과목 응답 모델"""
@@ -128,6 +246,7 @@ class TimetableResponse(BaseModel):
     """시간표 응답 모델"""
     timetable: List[CourseResponse]
     metadata: dict
+    nextCursor: Optional[int] = None  # 다음 페이지 조회용 커서 (limit 지정 시)
 
 
 class VacancySlot(BaseModel):
@@ -149,6 +268,28 @@ class VacancyResponse(BaseModel):
     summary: dict
 
 
+class FreeWindow(BaseModel):
+    """빈 시간 구간"""
+    startTime: str
+    endTime: str
+    minutes: int
+
+
+class FreeRoom(BaseModel):
+    """조회 조건을 만족하는 빈 강의실"""
+    room: str
+    day: str
+    capacity: Optional[int] = None  # 수용 인원 (설정되지 않은 강의실은 제한 없음)
+    capacityKnown: bool = False  # 수용 인원 설정 여부 (False면 attendees 필터가 적용되지 않은 강의실)
+    freeWindows: List[FreeWindow]
+
+
+class FreeRoomResponse(BaseModel):
+    """빈 강의실 조회 응답 모델"""
+    rooms: List[FreeRoom]
+    query: dict
+
+
 class VersionInfo(BaseModel):
     """버전 정보 응답 모델"""
     id: int
@@ -157,11 +298,20 @@ class VersionInfo(BaseModel):
     description: str
     isActive: bool
     courseCount: int
+    roomsUsed: List[str] = []
+    utilizationRate: float = 0.0
+    tag: Optional[str] = None
 
 
 class VersionResponse(BaseModel):
     """버전 목록 응답 모델"""
     versions: List[VersionInfo]
+    nextCursor: Optional[int] = None  # 다음 페이지 조회용 커서 (버전 번호)
+
+
+class VersionTagRequest(BaseModel):
+    """버전 태그 지정 요청 모델 (null이면 태그 해제)"""
+    tag: Optional[str] = None
 
 
 class CourseAddRequest(BaseModel):
@@ -180,6 +330,53 @@ class CourseAddRequest(BaseModel):
     is_lab: bool
 
 
+class CourseUpdateRequest(BaseModel):
+    """강의 수정 요청 모델 (지정한 필드만 변경)"""
+    id: int
+    process: Optional[str] = None
+    department: Optional[str] = None
+    course_code: Optional[str] = None
+    course_name: Optional[str] = None
+    area: Optional[str] = None
+    enrollment: Optional[int] = None
+    main_instructor: Optional[str] = None
+    instructor: Optional[str] = None
+    weeks: Optional[int] = None
+    credits: Optional[int] = None
+    is_lab: Optional[bool] = None
+
+
+class CourseBatchRequest(BaseModel):
+    """강의 일괄 변경 요청 모델 (한 번의 재배정으로 처리)"""
+    add: List[CourseAddRequest] = []
+    delete: List[int] = []
+    update: List[CourseUpdateRequest] = []
+
+
+class UnavailableTime(BaseModel):
+    """사용 불가 시간 (강의실 지정 시 강의실 대여 불가, 교수 지정 시 교수 부재, 둘 다 없으면 전체 휴강)"""
+    day: str
+    startTime: str = "09:00"
+    endTime: str = "18:00"
+    room: Optional[str] = None
+    instructor: Optional[str] = None
+    reason: Optional[str] = None
+
+
+class WhatIfRequest(BaseModel):
+    """시뮬레이션 요청 모델 (저장하지 않음)"""
+    unavailable_times: List[UnavailableTime] = []
+    extra_courses: List[CourseAddRequest] = []  # 특강 등 추가로 배정할 강의
+
+
+class RescheduleStatusResponse(BaseModel):
+    """재배정 대기 상태 응답 모델"""
+    ticket: int
+    status: str  # pending, done, failed
+    version: Optional[int] = None
+    detail: Optional[str] = None
+
+
 class CourseInfo(BaseModel):
     """강의 정보 응답 모델"""
     id: int
@@ -0,0 +1,131 @@
+"""
+재배정 요청 병합 큐
+
+강의 변경은 즉시 커밋하고 재배정 대기 상태로 표시합니다.
+마지막 변경 후 조용한 구간(RESCHEDULE_QUIET_SECONDS)이 지나거나 첫 변경 후
+최대 지연(RESCHEDULE_MAX_LATENCY_SECONDS)에 도달하면 대기 중인 모든 변경을
+한 번의 재배정으로 처리합니다. 각 변경은 티켓 번호로 결과 버전을 기다릴 수 있습니다.
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+# 병합 파라미터
+RESCHEDULE_QUIET_SECONDS = 0.5  # 마지막 변경 후 대기 시간
+RESCHEDULE_MAX_LATENCY_SECONDS = 5.0  # 첫 변경 후 최대 대기 시간
+RESULT_HISTORY_SIZE = 1000  # 보관할 완료 티켓 수
+MAX_DESCRIPTION_ITEMS = 3  # 버전 설명에 나열할 변경 수
+
+
+class RescheduleResult:
+    """재배정 결과 (버전 번호 또는 오류)"""
+
+    def __init__(self, version_number: Optional[int] = None, error: Optional[str] = None):
+        self.version_number = version_number
+        self.error = error
+
+
+def summarize_descriptions(descriptions: List[str]) -> str:
+    """병합된 변경 설명을 하나의 버전 설명으로 요약"""
+    if len(descriptions) <= MAX_DESCRIPTION_ITEMS:
+        return ", ".join(descriptions)
+    shown = ", ".join(descriptions[:MAX_DESCRIPTION_ITEMS])
+    return f"{shown} 외 {len(descriptions) - MAX_DESCRIPTION_ITEMS}건"
+
+
+class RescheduleCoordinator:
+    """재배정 병합 실행기 (디바운스 + 최대 지연 보장)"""
+
+    def __init__(
+        self,
+        run: Callable[[str], int],
+        quiet_seconds: float = RESCHEDULE_QUIET_SECONDS,
+        max_latency_seconds: float = RESCHEDULE_MAX_LATENCY_SECONDS
+    ):
+        self._run = run  # 재배정 실행 함수 (설명 -> 버전 번호, 별도 스레드에서 실행)
+        self.quiet_seconds = quiet_seconds
+        self.max_latency_seconds = max_latency_seconds
+        self.lock = asyncio.Lock()  # 재배정/시간표 생성 직렬화
+        self._pending: List[Tuple[int, str]] = []
+        self._first_dirty_at: Optional[float] = None
+        self._last_dirty_at: Optional[float] = None
+        self._next_ticket = 1
+        self._waiters: Dict[int, asyncio.Future] = {}
+        self._results: "OrderedDict[int, RescheduleResult]" = OrderedDict()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def pending_count(self) -> int:
+        """대기 중인 변경 수"""
+        return len(self._pending)
+
+    def mark_dirty(self, description: str) -> int:
+        """변경을 재배정 대기열에 추가하고 티켓 번호 반환"""
+        ticket = self._next_ticket
+        self._next_ticket += 1
+
+        now = time.monotonic()
+        if self._first_dirty_at is None:
+            self._first_dirty_at = now
+        self._last_dirty_at = now
+        self._pending.append((ticket, description))
+        self._waiters[ticket] = asyncio.get_running_loop().create_future()
+
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._worker())
+        return ticket
+
+    def get_result(self, ticket: int) -> Optional[RescheduleResult]:
+        """완료된 티켓의 결과 조회 (대기 중이거나 알 수 없으면 None)"""
+        return self._results.get(ticket)
+
+    def is_known(self, ticket: int) -> bool:
+        """발급된 티켓인지 확인"""
+        return ticket in self._waiters or ticket in self._results
+
+    async def wait(self, ticket: int, timeout: Optional[float] = None) -> Optional[RescheduleResult]:
+        """티켓의 재배정 완료 대기 (시간 초과 시 None)"""
+        result = self._results.get(ticket)
+        if result is not None:
+            return result
+        waiter = self._waiters.get(ticket)
+        if waiter is None:
+            return None
+        try:
+            return await asyncio.wait_for(asyncio.shield(waiter), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def _worker(self):
+        """대기열이 빌 때까지 조용한 구간/최대 지연 조건에 맞춰 재배정 실행"""
+        while self._pending:
+            now = time.monotonic()
+            run_at = min(
+                self._last_dirty_at + self.quiet_seconds,
+                self._first_dirty_at + self.max_latency_seconds
+            )
+            if now < run_at:
+                await asyncio.sleep(run_at - now)
+                continue
+
+            batch = self._pending
+            self._pending = []
+            self._first_dirty_at = None
+            self._last_dirty_at = None
+
+            description = summarize_descriptions([description for _, description in batch])
+            try:
+                async with self.lock:
+                    version_number = await asyncio.to_thread(self._run, description)
+                result = RescheduleResult(version_number=version_number)
+            except Exception as e:
+                result = RescheduleResult(error=str(e))
+
+            for ticket, _ in batch:
+                self._results[ticket] = result
+                waiter = self._waiters.pop(ticket, None)
+                if waiter is not None and not waiter.done():
+                    waiter.set_result(result)
+            while len(self._results) > RESULT_HISTORY_SIZE:
+                self._results.popitem(last=False)
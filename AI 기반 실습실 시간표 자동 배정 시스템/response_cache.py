@@ -0,0 +1,102 @@
+"""
+활성 버전 기준 응답 캐시
+
+조회 API 응답을 파티션과 활성 버전 ID별로 직렬화된 JSON 바이트로 저장하고,
+강한 ETag로 조건부 요청(If-None-Match)에 304를 반환합니다.
+한 파티션의 변경은 그 파티션의 캐시만 무효화합니다.
+"""
+import hashlib
+import inspect
+from collections import OrderedDict
+from typing import Awaitable, Callable, Hashable, Optional, Tuple, Union
+import orjson
+from fastapi import Request, Response
+from pydantic import BaseModel
+from metrics import record_cache
+
+RESPONSE_CACHE_SIZE = 128  # 캐시할 응답 수
+
+
+class CachedResponse:
+    """직렬화된 응답 본문과 ETag"""
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self.etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+
+
+# (파티션, 키, 버전 ID) -> 응답
+_response_cache: "OrderedDict[Tuple[Hashable, Hashable, Optional[int]], CachedResponse]" = OrderedDict()
+
+
+def invalidate_response_cache(partition: Optional[Hashable] = None) -> None:
+    """응답 캐시 비우기 (시간표 변경 시 호출, partition을 지정하면 해당 파티션만)"""
+    if partition is None:
+        _response_cache.clear()
+        return
+    for cache_key in list(_response_cache):
+        if cache_key[0] == partition:
+            _response_cache.pop(cache_key, None)
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match 헤더가 ETag와 일치하는지 확인"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+ResponseBody = Union[BaseModel, dict, str]
+ResponseBuilder = Callable[[], Union[ResponseBody, Awaitable[ResponseBody]]]
+
+
+async def get_cached_response(
+    partition: Hashable, key: Hashable, version_id: Optional[int], build: ResponseBuilder
+) -> CachedResponse:
+    """
+    캐시된 응답 조회 (없으면 build로 생성 후 직렬화하여 저장)
+
+    모델은 검증된 JSON으로, 딕셔너리는 내부에서 만든 신뢰 데이터이므로 검증 없이 orjson으로 직렬화하고,
+    문자열은 이미 직렬화된 JSON으로 간주합니다.
+    """
+    cache_key = (partition, key, version_id)
+    entry = _response_cache.get(cache_key)
+    record_cache("response", entry is not None)
+    if entry is not None:
+        _response_cache.move_to_end(cache_key)
+        return entry
+
+    built = build()
+    if inspect.isawaitable(built):
+        built = await built
+    if isinstance(built, dict):
+        body = orjson.dumps(built)
+    elif isinstance(built, str):
+        body = built.encode("utf-8")
+    else:
+        body = built.model_dump_json().encode("utf-8")
+    entry = CachedResponse(body)
+    _response_cache[cache_key] = entry
+    while len(_response_cache) > RESPONSE_CACHE_SIZE:
+        _response_cache.popitem(last=False)
+    return entry
+
+
+async def cached_json_response(
+    request: Request,
+    partition: Hashable,
+    key: Hashable,
+    version_id: Optional[int],
+    build: ResponseBuilder,
+    media_type: str = "application/json"
+) -> Response:
+    """캐시된 JSON 응답 반환 (ETag 일치 시 304, build는 동기/비동기 함수 모두 가능)"""
+    entry = await get_cached_response(partition, key, version_id, build)
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache", "Vary": "Accept"}
+    if _etag_matches(request.headers.get("if-none-match"), entry.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type=media_type, headers=headers)
@@ -0,0 +1,259 @@
+"""
+버전 보존 정책 및 이력 정리
+
+파티션(테넌트/학기)마다 보존 규칙(최근 N개, 최근 며칠간 날짜별 마지막 버전, 태그된 버전)에
+해당하지 않는 버전과 그 이력 행을 삭제합니다. 삭제된 버전을 거쳐 복원되던 델타 버전은 남은 버전 기준으로
+다시 인코딩합니다. SQLite는 정리 후 증분 VACUUM으로 빈 페이지를 파일에서 반환합니다.
+"""
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from models import Partition, ScheduleHistory, TimetableVersion, VacancyAnalysis, SessionLocal, engine
+from storage import is_sqlite
+from version_history import SNAPSHOT_INTERVAL, clear_reconstruction_cache, reconstruct_version, write_history_rows
+
+# 보존 정책 기본값
+RETENTION_KEEP_LAST = int(os.getenv("TIMETABLE_RETENTION_KEEP_LAST", "50"))  # 최근 버전 수
+RETENTION_KEEP_DAILY_DAYS = int(os.getenv("TIMETABLE_RETENTION_KEEP_DAILY_DAYS", "30"))  # 날짜별 마지막 버전 보존 기간
+COMPACTION_INTERVAL_SECONDS = float(os.getenv("TIMETABLE_COMPACTION_INTERVAL_SECONDS", str(6 * 60 * 60)))  # 0이면 끔
+VACUUM_STEP_PAGES = 1000  # 증분 VACUUM 한 번에 반환할 페이지 수
+
+SQLITE_AUTO_VACUUM_INCREMENTAL = 2
+
+
+class RetentionPolicy:
+    """버전 보존 규칙 (파티션별로 적용, 활성 버전과 최신 버전은 항상 보존)"""
+
+    def __init__(
+        self,
+        keep_last: int = RETENTION_KEEP_LAST,
+        keep_daily_days: int = RETENTION_KEEP_DAILY_DAYS,
+        keep_tagged: bool = True
+    ):
+        self.keep_last = keep_last
+        self.keep_daily_days = keep_daily_days
+        self.keep_tagged = keep_tagged
+
+    def to_dict(self) -> Dict:
+        """응답용 딕셔너리로 변환"""
+        return {"keepLast": self.keep_last, "keepDailyDays": self.keep_daily_days, "keepTagged": self.keep_tagged}
+
+
+def select_versions_to_keep(
+    versions: List[TimetableVersion], policy: RetentionPolicy, now: Optional[datetime] = None
+) -> Set[int]:
+    """보존할 버전 ID 집합 (versions는 한 파티션의 버전)"""
+    if not versions:
+        return set()
+    now = now or datetime.utcnow()
+    newest_first = sorted(versions, key=lambda v: v.version_number, reverse=True)
+
+    keep = {v.id for v in newest_first[:max(policy.keep_last, 1)]}
+    keep.update(v.id for v in versions if v.is_active)
+    if policy.keep_tagged:
+        keep.update(v.id for v in versions if v.tag)
+
+    if policy.keep_daily_days > 0:
+        cutoff = (now - timedelta(days=policy.keep_daily_days)).date()
+        seen_days = set()
+        for version in newest_first:
+            if version.created_at is None:
+                continue
+            day = version.created_at.date()
+            if day >= cutoff and day not in seen_days:
+                seen_days.add(day)
+                keep.add(version.id)
+    return keep
+
+
+class CompactionReport:
+    """이력 정리 결과"""
+
+    def __init__(self, policy: RetentionPolicy):
+        self.policy = policy
+        self.ran_at = datetime.utcnow()
+        self.started = time.monotonic()
+        self.partitions = 0
+        self.versions_deleted = 0
+        self.versions_reencoded = 0
+        self.history_rows_deleted = 0
+        self.bytes_before: Optional[int] = None
+        self.bytes_after: Optional[int] = None
+        self.duration_seconds = 0.0
+
+    def to_dict(self) -> Dict:
+        """응답용 딕셔너리로 변환"""
+        reclaimed = None
+        if self.bytes_before is not None and self.bytes_after is not None:
+            reclaimed = self.bytes_before - self.bytes_after
+        return {
+            "ranAt": self.ran_at.isoformat(),
+            "policy": self.policy.to_dict(),
+            "partitions": self.partitions,
+            "versionsDeleted": self.versions_deleted,
+            "versionsReencoded": self.versions_reencoded,
+            "historyRowsDeleted": self.history_rows_deleted,
+            "bytesBefore": self.bytes_before,
+            "bytesAfter": self.bytes_after,
+            "reclaimedBytes": reclaimed,
+            "durationSeconds": round(self.duration_seconds, 3)
+        }
+
+
+def _chain_passes_through(version: TimetableVersion, expired: Set[int], by_id: Dict[int, TimetableVersion]) -> bool:
+    """델타 체인(부모 -> ... -> 스냅샷)에 삭제될 버전이 있는지 확인"""
+    current = version
+    while current.delta_depth:
+        current = by_id.get(current.parent_id)
+        if current is None:
+            return False
+        if current.id in expired:
+            return True
+    return False
+
+
+def list_partitions() -> List[Partition]:
+    """버전이 있는 파티션 목록"""
+    db = SessionLocal()
+    try:
+        rows = db.query(TimetableVersion.tenant, TimetableVersion.semester).distinct().all()
+    finally:
+        db.close()
+    return sorted(Partition(*row) for row in rows)
+
+
+def compact_versions(
+    db: Session,
+    partition: Partition,
+    policy: RetentionPolicy,
+    report: CompactionReport,
+    now: Optional[datetime] = None
+) -> None:
+    """파티션에서 보존 대상이 아닌 버전 삭제 및 영향받은 델타 버전 재인코딩 (커밋 포함)"""
+    report.partitions += 1
+    versions = db.query(TimetableVersion).filter(
+        TimetableVersion.in_partition(partition)
+    ).order_by(TimetableVersion.version_number).all()
+    keep = select_versions_to_keep(versions, policy, now)
+    expired = {v.id for v in versions if v.id not in keep}
+    if not expired:
+        return
+
+    by_id = {v.id: v for v in versions}
+    kept = [v for v in versions if v.id in keep]
+    new_parents = {v.id: (kept[i - 1] if i > 0 else None) for i, v in enumerate(kept)}
+    affected = [v for v in kept if _chain_passes_through(v, expired, by_id)]
+
+    # 삭제 전에 재인코딩할 버전과 새 부모 버전의 시간표 복원
+    records = {}
+    for version in affected:
+        records[version.id] = reconstruct_version(db, version.id)
+        parent = new_parents[version.id]
+        if parent is not None and parent.id not in records:
+            records[parent.id] = reconstruct_version(db, parent.id)
+
+    expired_ids = list(expired)
+    report.history_rows_deleted += db.query(ScheduleHistory).filter(
+        ScheduleHistory.version_id.in_(expired_ids + [v.id for v in affected])
+    ).delete(synchronize_session=False)
+    db.query(VacancyAnalysis).filter(VacancyAnalysis.version_id.in_(expired_ids)).delete(synchronize_session=False)
+    report.versions_deleted += db.query(TimetableVersion).filter(
+        TimetableVersion.id.in_(expired_ids)
+    ).delete(synchronize_session=False)
+
+    # 남은 버전의 부모/델타 정보 재계산 (버전 번호 순)
+    affected_ids = {v.id for v in affected}
+    for version in kept:
+        parent = new_parents[version.id]
+        version.parent_id = parent.id if parent else None
+        if version.id in affected_ids:
+            is_snapshot = parent is None or (parent.delta_depth or 0) + 1 >= SNAPSHOT_INTERVAL
+            write_history_rows(
+                db, version.id, records[version.id], None if is_snapshot else records[parent.id]
+            )
+            version.delta_depth = 0 if is_snapshot else parent.delta_depth + 1
+            version.snapshot_id = version.id if is_snapshot else parent.snapshot_id
+        elif version.delta_depth:
+            # 재인코딩된 부모가 스냅샷이 되었을 수 있으므로 체인 정보만 갱신
+            version.delta_depth = (parent.delta_depth or 0) + 1
+            version.snapshot_id = parent.snapshot_id
+    report.versions_reencoded += len(affected)
+
+    db.commit()
+    clear_reconstruction_cache()
+
+
+def database_size(bind: Engine) -> Optional[int]:
+    """SQLite 데이터베이스 크기 (사용 중인 페이지 기준 바이트, SQLite가 아니면 None)"""
+    if not is_sqlite(str(bind.url)):
+        return None
+    with bind.connect() as connection:
+        page_count = connection.exec_driver_sql("PRAGMA page_count").scalar()
+        page_size = connection.exec_driver_sql("PRAGMA page_size").scalar()
+    return page_count * page_size
+
+
+def vacuum_database(bind: Engine) -> None:
+    """
+    SQLite 빈 페이지 반환
+
+    auto_vacuum이 INCREMENTAL이 아니면 한 번만 전체 VACUUM으로 전환하고,
+    이후에는 VACUUM_STEP_PAGES씩 나누어 반환해 쓰기 잠금을 짧게 유지합니다.
+    """
+    if not is_sqlite(str(bind.url)):
+        return
+    with bind.connect() as connection:
+        connection = connection.execution_options(isolation_level="AUTOCOMMIT")
+        if connection.exec_driver_sql("PRAGMA auto_vacuum").scalar() != SQLITE_AUTO_VACUUM_INCREMENTAL:
+            connection.exec_driver_sql("PRAGMA auto_vacuum=INCREMENTAL")
+            connection.exec_driver_sql("VACUUM")
+        else:
+            while connection.exec_driver_sql("PRAGMA freelist_count").scalar() > 0:
+                connection.exec_driver_sql(f"PRAGMA incremental_vacuum({VACUUM_STEP_PAGES})")
+        connection.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+
+
+_last_report: Optional[CompactionReport] = None
+
+
+def start_compaction(policy: Optional[RetentionPolicy] = None) -> CompactionReport:
+    """이력 정리 시작 (정리 전 데이터베이스 크기 기록)"""
+    report = CompactionReport(policy or RetentionPolicy())
+    report.bytes_before = database_size(engine)
+    return report
+
+
+def compact_partition(partition: Partition, report: CompactionReport) -> None:
+    """한 파티션의 이력 정리 (별도 세션, 같은 파티션의 재배정과 동시에 실행하지 않도록 호출자가 직렬화)"""
+    db = SessionLocal()
+    try:
+        compact_versions(db, partition, report.policy, report)
+    finally:
+        db.close()
+
+
+def finish_compaction(report: CompactionReport) -> CompactionReport:
+    """삭제된 버전이 있으면 VACUUM 후 결과 기록"""
+    global _last_report
+    if report.versions_deleted:
+        vacuum_database(engine)
+    report.bytes_after = database_size(engine)
+    report.duration_seconds = time.monotonic() - report.started
+    _last_report = report
+    return report
+
+
+def run_compaction(policy: Optional[RetentionPolicy] = None) -> CompactionReport:
+    """모든 파티션에 보존 정책 적용 후 VACUUM 실행 (재배정과의 직렬화는 호출자가 담당)"""
+    report = start_compaction(policy)
+    for partition in list_partitions():
+        compact_partition(partition, report)
+    return finish_compaction(report)
+
+
+def get_last_compaction_report() -> Optional[CompactionReport]:
+    """마지막 이력 정리 결과"""
+    return _last_report
@@ -150,9 +150,11 @@ class Chromosome:
 class TimetableScheduler:
     """시간표 자동 배정 스케줄러 (유전 알고리즘)"""
     
-    def __init__(self, courses: List[Course]):
+    def __init__(self, courses: List[Course], seed: Optional[int] = None):
         self.courses = courses
         self.best_chromosome: Optional[Chromosome] = None
+        self.generations_run = 0  # 마지막 schedule() 실행 세대 수
+        self.random = random.Random(seed)  # seed를 지정하면 같은 강의 목록에 같은 결과
     
     def _generate_random_chromosome(self) -> Chromosome:
         """랜덤 개체 생성 (초기 개체군용)"""
@@ -164,7 +166,7 @@ class TimetableScheduler:
             if not start_time:
                 continue
             
-            day = random.choice(DAYS)
+            day = self.random.choice(DAYS)
             if not is_valid_time_slot(start_time):
                 continue
             
@@ -181,11 +183,11 @@ class TimetableScheduler:
             return None
         
         weights = [1.0 / (time_slot_usage[slot] + 1) for slot in valid_slots]
-        return random.choices(valid_slots, weights=weights, k=1)[0]
+        return self.random.choices(valid_slots, weights=weights, k=1)[0]
     
     def _select_room_by_preference(self) -> str:
         """강의실 선택 (기본 강의실 우선)"""
-        return random.choice(ROOMS) if random.random() < DEFAULT_ROOM_PREFERENCE else RENTAL_ROOM
+        return self.random.choice(ROOMS) if self.random.random() < DEFAULT_ROOM_PREFERENCE else RENTAL_ROOM
     
     def _calculate_fitness(self, chromosome: Chromosome) -> float:
         """적합도 함수 계산"""
@@ -430,7 +432,7 @@ class TimetableScheduler:
     def _select_parents(self, population: List[Chromosome]) -> Tuple[Chromosome, Chromosome]:
         """토너먼트 선택으로 부모 선택"""
         def tournament_select() -> Chromosome:
-            tournament = random.sample(population, min(TOURNAMENT_SIZE, len(population)))
+            tournament = self.random.sample(population, min(TOURNAMENT_SIZE, len(population)))
             return max(tournament, key=lambda c: c.fitness)
         
         return tournament_select(), tournament_select()
@@ -482,7 +484,7 @@ class TimetableScheduler:
         
         # 각 강의에 대해 부모 중 하나의 배정을 상속
         for course in self.courses:
-            if random.random() < preferred_parent_prob:
+            if self.random.random() < preferred_parent_prob:
                 source_parent = parent1 if course.id in parent1.assignments else parent2
             else:
                 source_parent = parent2 if course.id in parent2.assignments else parent1
@@ -503,8 +505,8 @@ class TimetableScheduler:
                     time_slot_usage[start_time] += 1
         
         for course in self.courses:
-            if random.random() < MUTATION_RATE:
-                day = random.choice(DAYS)
+            if self.random.random() < MUTATION_RATE:
+                day = self.random.choice(DAYS)
                 start_time = self._select_time_slot_by_usage(time_slot_usage)
                 if start_time:
                     time_slot_usage[start_time] += 1
@@ -622,6 +624,7 @@ class TimetableScheduler:
     
     def schedule(self) -> List[CourseAssignment]:
         """시간표 자동 배정 실행 (유전 알고리즘)"""
+        self.generations_run = 0
         if not self.courses:
             return []
         
@@ -639,7 +642,7 @@ class TimetableScheduler:
             
             new_population = elites.copy()
             while len(new_population) < POPULATION_SIZE:
-                if random.random() < CROSSOVER_RATE:
+                if self.random.random() < CROSSOVER_RATE:
                     parent1, parent2 = self._select_parents(population)
                     child = self._crossover(parent1, parent2)
                     self._mutate(child)
@@ -654,6 +657,7 @@ class TimetableScheduler:
                 new_population.append(child)
             
             population = new_population
+            self.generations_run = generation + 1
             
             # 최고 개체 업데이트
             current_best = max(population, key=lambda c: c.fitness)
@@ -0,0 +1,131 @@
+"""
+요청별 SQL 프로파일러 (디버그용)
+
+TIMETABLE_SQL_PROFILE=1이면 요청마다 실행된 SQL 구문의 수와 시간을 모아
+X-SQL-Profile 응답 헤더와 INFO 로그 한 줄로 보여줍니다.
+같은 SELECT가 한 요청에서 SQL_REPEAT_THRESHOLD번 이상 반복되면 N+1 조회로 보고 WARNING 로그를 남깁니다.
+요청 문맥은 contextvars로 전달되므로 asyncio.to_thread로 실행한 동기 세션의 쿼리도 집계됩니다.
+"""
+import logging
+import os
+import re
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+SQL_PROFILE_ENABLED = os.getenv("TIMETABLE_SQL_PROFILE", "0") == "1"
+SQL_REPEAT_THRESHOLD = int(os.getenv("TIMETABLE_SQL_REPEAT_THRESHOLD", "5"))  # N+1로 표시할 반복 횟수
+SQL_PROFILE_HEADER = b"x-sql-profile"
+MAX_LOGGED_STATEMENT_LENGTH = 160
+
+logger = logging.getLogger(__name__)
+
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_statement(statement: str) -> str:
+    """구문 비교용 정규화 (공백 정리, IN 목록의 파라미터 수 무시)"""
+    return _IN_LIST.sub("(?)", _WHITESPACE.sub(" ", statement).strip())
+
+
+class RequestProfile:
+    """한 요청에서 실행된 SQL 집계"""
+
+    def __init__(self, method: str, path: str):
+        self.method = method
+        self.path = path
+        self.query_count = 0
+        self.query_seconds = 0.0
+        self.statements: Dict[str, List[float]] = {}  # 정규화된 구문 -> [실행 수, 누적 시간]
+        self.closed = False  # 응답 완료 후 (요청에서 시작된 백그라운드 작업의 쿼리는 제외)
+
+    def record(self, statement: str, seconds: float) -> None:
+        """구문 실행 기록"""
+        if self.closed:
+            return
+        self.query_count += 1
+        self.query_seconds += seconds
+        entry = self.statements.setdefault(normalize_statement(statement), [0, 0.0])
+        entry[0] += 1
+        entry[1] += seconds
+
+    def repeated_selects(self) -> List[Tuple[str, int, float]]:
+        """SQL_REPEAT_THRESHOLD번 이상 반복된 SELECT (N+1 의심, 반복 횟수 순)"""
+        repeated = [
+            (statement, int(count), total)
+            for statement, (count, total) in self.statements.items()
+            if count >= SQL_REPEAT_THRESHOLD and statement.upper().startswith(("SELECT", "WITH"))
+        ]
+        return sorted(repeated, key=lambda item: item[1], reverse=True)
+
+    def header_value(self) -> str:
+        """X-SQL-Profile 헤더 값"""
+        return (
+            f"queries={self.query_count}; time_ms={self.query_seconds * 1000:.2f}; "
+            f"n_plus_one={len(self.repeated_selects())}"
+        )
+
+    def log(self) -> None:
+        """요약은 INFO, N+1 의심 구문은 WARNING으로 기록"""
+        logger.info("%s %s %s", self.method, self.path, self.header_value())
+        for statement, count, total in self.repeated_selects():
+            if len(statement) > MAX_LOGGED_STATEMENT_LENGTH:
+                statement = statement[:MAX_LOGGED_STATEMENT_LENGTH] + "..."
+            logger.warning(
+                "N+1 의심 (%s %s): %d회, %.2fms: %s", self.method, self.path, count, total * 1000, statement
+            )
+
+
+_current_profile: ContextVar[Optional[RequestProfile]] = ContextVar("sql_profile", default=None)
+
+
+def install_sql_profiler(engine: Engine) -> None:
+    """엔진 이벤트로 현재 요청의 SQL 실행 기록 (비동기 엔진은 sync_engine 전달)"""
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if _current_profile.get() is not None:
+            context._sql_profile_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        profile = _current_profile.get()
+        started = getattr(context, "_sql_profile_started", None)
+        if profile is not None and started is not None:
+            profile.record(statement, time.perf_counter() - started)
+
+
+class SqlProfilerMiddleware:
+    """
+    요청별 SQL 수/시간을 X-SQL-Profile 헤더와 로그로 보고하는 ASGI 미들웨어
+
+    헤더는 응답 시작 시점까지의 집계이고, 로그는 스트리밍 응답 본문 전송 중의 쿼리까지 포함합니다.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(scope["method"], scope["path"])
+        token = _current_profile.set(profile)
+
+        async def send_with_profile(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((SQL_PROFILE_HEADER, profile.header_value().encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_profile)
+        finally:
+            profile.closed = True
+            _current_profile.reset(token)
+            if profile.query_count:
+                profile.log()
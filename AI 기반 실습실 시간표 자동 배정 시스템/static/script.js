@@ -1,5 +1,62 @@
 const API_BASE_URL = 'http://127.0.0.1:8000';
 
+// 시간표 파티션 (페이지 주소의 ?tenant=&semester=를 모든 API 요청에 전달, 없으면 기본 파티션)
+const PARTITION_PARAMS = new URLSearchParams(
+    [...new URLSearchParams(window.location.search)].filter(([key]) => key === 'tenant' || key === 'semester')
+);
+
+// API 요청 URL 생성 (파티션 파라미터 추가)
+function apiUrl(path) {
+    const partition = PARTITION_PARAMS.toString();
+    if (!partition) {
+        return `${API_BASE_URL}${path}`;
+    }
+    return `${API_BASE_URL}${path}${path.includes('?') ? '&' : '?'}${partition}`;
+}
+
+// ETag 기반 조회 캐시 (URL -> { etag, data })
+const etagCache = new Map();
+
+// 조건부 요청으로 JSON 조회 (304이면 캐시된 데이터 사용)
+async function fetchJsonWithETag(url) {
+    const cached = etagCache.get(url);
+    const headers = cached ? { 'If-None-Match': cached.etag } : {};
+    const response = await fetch(url, { headers });
+    
+    if (response.status === 304 && cached) {
+        return { ok: true, data: cached.data };
+    }
+    if (!response.ok) {
+        return { ok: false, data: null };
+    }
+    
+    const data = await response.json();
+    const etag = response.headers.get('ETag');
+    if (etag) {
+        etagCache.set(url, { etag, data });
+    }
+    return { ok: true, data };
+}
+
+// 컬럼형(사전 인코딩) 시간표 응답을 과목 객체 배열로 변환
+function decodeColumnarTimetable(payload) {
+    const { columns, dictionaries } = payload;
+    const fields = Object.keys(columns);
+    const timetable = new Array(payload.count);
+    
+    for (let i = 0; i < payload.count; i++) {
+        const item = {};
+        fields.forEach(field => {
+            const value = columns[field][i];
+            const dictionary = dictionaries[field];
+            item[field] = dictionary ? dictionary[value] : value;
+        });
+        item.isLab = item.isLab === 1;
+        timetable[i] = item;
+    }
+    return timetable;
+}
+
 // 탭 전환
 document.addEventListener('DOMContentLoaded', function() {
     const tabButtons = document.querySelectorAll('.tab-btn');
@@ -39,7 +96,7 @@ async function buildSchedule() {
     formData.append('file', fileInput.files[0]);
     
     try {
-        const response = await fetch(`${API_BASE_URL}/api/schedule/build`, {
+        const response = await fetch(apiUrl('/api/schedule/build'), {
             method: 'POST',
             body: formData
         });
@@ -69,21 +126,18 @@ async function viewSchedule() {
     summaryBox.innerHTML = '<span class="loading"></span> 로딩 중...';
     
     try {
-        const response = await fetch(`${API_BASE_URL}/api/schedule`);
+        // 강의실 필터링 (서버에서 처리), 컬럼형 응답으로 전송량 감소
+        const query = roomSelect !== '전체' ? `&room=${encodeURIComponent(roomSelect)}` : '';
+        const { ok, data } = await fetchJsonWithETag(apiUrl(`/api/schedule?format=columnar${query}`));
         
-        if (response.ok) {
-            const data = await response.json();
-            let timetable = data.timetable;
-            
-            // 강의실 필터링
+        if (ok) {
             if (roomSelect !== '전체') {
-                timetable = timetable.filter(t => t.room === roomSelect);
-                summaryBox.textContent = `${roomSelect} 강의실: ${timetable.length}개 과목이 배정되었습니다.`;
+                summaryBox.textContent = `${roomSelect} 강의실: ${data.count}개 과목이 배정되었습니다.`;
             } else {
-                summaryBox.textContent = `전체: 총 ${timetable.length}개 과목이 배정되었습니다.`;
+                summaryBox.textContent = `전체: 총 ${data.count}개 과목이 배정되었습니다.`;
             }
             
-            displayCalendar(timetable, calendarBox);
+            displayCalendar(data, calendarBox);
         } else {
             summaryBox.className = 'result-box error';
             summaryBox.textContent = '❌ 시간표를 불러올 수 없습니다.';
@@ -101,10 +155,9 @@ async function analyzeVacancy() {
     resultBox.innerHTML = '<span class="loading"></span> 분석 중...';
     
     try {
-        const response = await fetch(`${API_BASE_URL}/api/vacancy`);
+        const { ok, data } = await fetchJsonWithETag(apiUrl('/api/vacancy'));
         
-        if (response.ok) {
-            const data = await response.json();
+        if (ok) {
             let html = '<h3>공실 분석 결과</h3>';
             html += `<p><strong>전체 활용률: ${(data.summary.overallUtilizationRate * 100).toFixed(1)}%</strong></p>`;
             html += '<h4>강의실별 활용률</h4><ul>';
@@ -144,7 +197,7 @@ async function addCourse() {
     resultBox.innerHTML = '<span class="loading"></span> 처리 중...';
     
     try {
-        const response = await fetch(`${API_BASE_URL}/api/courses/add`, {
+        const response = await fetch(apiUrl('/api/courses/add'), {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
             body: JSON.stringify(payload)
@@ -174,10 +227,9 @@ async function listCourses() {
     tableBox.innerHTML = '<p>로딩 중...</p>';
     
     try {
-        const response = await fetch(`${API_BASE_URL}/api/courses`);
+        const { ok, data } = await fetchJsonWithETag(apiUrl('/api/courses'));
         
-        if (response.ok) {
-            const data = await response.json();
+        if (ok) {
             const courses = data.courses;
             
             // 테이블 생성
@@ -218,33 +270,38 @@ async function deleteCourses() {
     
     resultBox.innerHTML = '<span class="loading"></span> 처리 중...';
     
-    const results = [];
-    for (const id of selectedIds) {
-        try {
-            const response = await fetch(`${API_BASE_URL}/api/courses/${id}`, {
-                method: 'DELETE'
-            });
-            
-            if (response.ok) {
-                const data = await response.json();
-                results.push(`강의 ID ${id}: ✅ 삭제 완료 (총 ${data.timetable.length}개 과목 배정됨)`);
-            } else {
-                const error = await response.json();
-                results.push(`강의 ID ${id}: ❌ ${error.detail || '삭제 실패'}`);
-            }
-        } catch (error) {
-            results.push(`강의 ID ${id}: ❌ 서버 연결 실패`);
+    try {
+        // 선택한 강의를 한 번에 삭제 (재배정 1회)
+        const response = await fetch(apiUrl('/api/courses/batch'), {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ delete: selectedIds })
+        });
+        
+        if (response.ok) {
+            const data = await response.json();
+            resultBox.className = 'result-box success';
+            resultBox.textContent = `✅ ${selectedIds.length}개 강의 삭제 완료 (총 ${data.timetable.length}개 과목 배정됨)`;
+        } else {
+            const error = await response.json();
+            resultBox.className = 'result-box error';
+            resultBox.textContent = `❌ 오류: ${error.detail || '삭제 실패'}`;
         }
+    } catch (error) {
+        resultBox.className = 'result-box error';
+        resultBox.textContent = '❌ 서버에 연결할 수 없습니다.';
     }
     
-    resultBox.className = results.every(r => r.includes('✅')) ? 'result-box success' : 'result-box';
-    resultBox.innerHTML = results.join('<br>');
-    
     listCourses(); // 목록 새로고침
 }
 
 // 캘린더 표시 (Python timetable_visualizer 로직을 JS로 변환)
 function displayCalendar(timetable, container) {
+    // 컬럼형 응답이면 과목 배열로 변환
+    if (timetable && timetable.format === 'columnar') {
+        timetable = decodeColumnarTimetable(timetable);
+    }
+    
     if (!timetable || timetable.length === 0) {
         container.innerHTML = '<p>시간표가 없습니다.</p>';
         return;
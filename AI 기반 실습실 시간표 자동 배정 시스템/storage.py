@@ -0,0 +1,104 @@
+"""
+데이터베이스 연결 설정
+
+TIMETABLE_DATABASE_URL 환경 변수로 SQLAlchemy URL을 지정할 수 있습니다 (기본: SQLite 파일).
+SQLite는 WAL 저널링, synchronous=NORMAL, mmap, busy timeout을 연결마다 설정하고,
+그 외 데이터베이스는 커넥션 풀 설정을 적용합니다.
+"""
+import os
+from typing import Optional
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+DEFAULT_DATABASE_URL = "sqlite:///./timetable.db"
+
+# SQLite PRAGMA 설정
+SQLITE_JOURNAL_MODE = "WAL"  # 쓰기 중에도 읽기 가능
+SQLITE_SYNCHRONOUS = "NORMAL"  # WAL 모드에서 안전한 범위의 fsync 감소
+SQLITE_MMAP_SIZE = 256 * 1024 * 1024  # 메모리 매핑 크기 (바이트)
+SQLITE_BUSY_TIMEOUT_MS = 5000  # 잠금 대기 시간 (밀리초)
+
+# 커넥션 풀 설정 (SQLite 외 데이터베이스)
+POOL_SIZE = int(os.getenv("TIMETABLE_DB_POOL_SIZE", "5"))
+POOL_MAX_OVERFLOW = int(os.getenv("TIMETABLE_DB_MAX_OVERFLOW", "10"))
+POOL_RECYCLE_SECONDS = 1800
+
+# 동기 드라이버 -> 비동기 드라이버
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+}
+
+
+def get_database_url() -> str:
+    """동기 엔진용 데이터베이스 URL"""
+    return os.getenv("TIMETABLE_DATABASE_URL", DEFAULT_DATABASE_URL)
+
+
+def get_async_database_url(url: Optional[str] = None) -> str:
+    """비동기 엔진용 데이터베이스 URL (TIMETABLE_ASYNC_DATABASE_URL 또는 동기 URL에서 변환)"""
+    override = os.getenv("TIMETABLE_ASYNC_DATABASE_URL")
+    if override:
+        return override
+
+    parsed = make_url(url or get_database_url())
+    if parsed.drivername in ASYNC_DRIVERS.values():
+        return parsed.render_as_string(hide_password=False)
+    if parsed.drivername not in ASYNC_DRIVERS:
+        raise ValueError(
+            f"{parsed.drivername}의 비동기 드라이버를 알 수 없습니다. "
+            "TIMETABLE_ASYNC_DATABASE_URL을 지정하세요."
+        )
+    return parsed.set(drivername=ASYNC_DRIVERS[parsed.drivername]).render_as_string(hide_password=False)
+
+
+def is_sqlite(url: str) -> bool:
+    """SQLite URL 여부"""
+    return make_url(url).get_backend_name() == "sqlite"
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    """SQLite 연결마다 PRAGMA 설정"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+    cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute("PRAGMA auto_vacuum=INCREMENTAL")  # 새 데이터베이스만 적용 (기존 파일은 retention.py에서 전환)
+    cursor.close()
+
+
+def _engine_options(url: str) -> dict:
+    """URL에 맞는 엔진 옵션"""
+    if is_sqlite(url):
+        return {"connect_args": {"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000}}
+    return {
+        "pool_size": POOL_SIZE,
+        "max_overflow": POOL_MAX_OVERFLOW,
+        "pool_recycle": POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": True,
+    }
+
+
+def create_configured_engine(url: Optional[str] = None) -> Engine:
+    """설정이 적용된 동기 엔진 생성"""
+    url = url or get_database_url()
+    engine = create_engine(url, **_engine_options(url))
+    if is_sqlite(url):
+        event.listen(engine, "connect", _set_sqlite_pragmas)
+    return engine
+
+
+def create_configured_async_engine(url: Optional[str] = None) -> AsyncEngine:
+    """설정이 적용된 비동기 엔진 생성"""
+    url = url or get_async_database_url()
+    options = _engine_options(url)
+    if is_sqlite(url):
+        options = {"connect_args": {"timeout": SQLITE_BUSY_TIMEOUT_MS / 1000}}
+    engine = create_async_engine(url, **options)
+    if is_sqlite(url):
+        event.listen(engine.sync_engine, "connect", _set_sqlite_pragmas)
+    return engine
@@ -0,0 +1,265 @@
+"""
+시간표 내보내기 (CSV, iCalendar, XLSX)
+
+배정 행을 순회하면서 일정 행 수마다 바이트 조각을 만들어 내보내므로
+시간표 크기와 관계없이 메모리 사용량이 일정하고 첫 바이트가 바로 전송됩니다.
+"""
+import csv
+import io
+import zipfile
+from datetime import date, datetime, timedelta
+from typing import Iterable, Iterator, List, Optional
+from xml.sax.saxutils import escape
+from scheduler import DAYS
+
+EXPORT_FLUSH_ROWS = 500  # 조각 하나에 담을 행 수
+DEFAULT_WEEKS = 15  # 수업주수가 없을 때 반복 횟수
+
+# 형식 -> (미디어 타입, 확장자)
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),  # text/* 타입은 응답에서 charset=utf-8이 붙음
+    "ics": ("text/calendar", "ics"),
+    "xlsx": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "xlsx"),
+}
+
+# 표 형식(CSV/XLSX) 컬럼: (헤더, 속성)
+EXPORT_COLUMNS = [
+    ("교과목코드", "course_code"),
+    ("교과목명", "course_name"),
+    ("강좌담당교수", "instructor"),
+    ("개설학과", "department"),
+    ("요일", "day"),
+    ("시작시간", "start_time"),
+    ("종료시간", "end_time"),
+    ("강의실", "room"),
+    ("실습여부", "is_lab"),
+    ("수강인원", "enrollment"),
+    ("수업주수", "weeks"),
+    ("교과목학점", "credits"),
+]
+
+
+def export_filename(fmt: str, version_number: Optional[int] = None) -> str:
+    """내보내기 파일 이름"""
+    _, extension = EXPORT_FORMATS[fmt]
+    if version_number is None:
+        return f"timetable.{extension}"
+    return f"timetable_v{version_number}.{extension}"
+
+
+def _row_values(schedule) -> List:
+    """배정 행을 표 형식 컬럼 값 목록으로 변환"""
+    return [getattr(schedule, attribute) for _, attribute in EXPORT_COLUMNS]
+
+
+def iter_csv(schedules: Iterable) -> Iterator[bytes]:
+    """CSV 조각 생성 (엑셀 호환을 위해 UTF-8 BOM 포함)"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([header for header, _ in EXPORT_COLUMNS])
+    yield buffer.getvalue().encode("utf-8-sig")
+    buffer.seek(0)
+    buffer.truncate()
+
+    for count, schedule in enumerate(schedules, 1):
+        values = _row_values(schedule)
+        values[8] = "실습" if schedule.is_lab else ""
+        writer.writerow(values)
+        if count % EXPORT_FLUSH_ROWS == 0:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def semester_monday(start: Optional[date] = None) -> date:
+    """학기 시작 주의 월요일 (지정하지 않으면 이번 주)"""
+    start = start or date.today()
+    return start - timedelta(days=start.weekday())
+
+
+def _ics_text(value) -> str:
+    """iCalendar TEXT 값 이스케이프"""
+    text = "" if value is None else str(value)
+    return (
+        text.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+        .replace("\r\n", "\\n").replace("\n", "\\n")
+    )
+
+
+def _ics_line(line: str) -> str:
+    """75옥텟 단위로 줄 접기 (RFC 5545)"""
+    encoded = line.encode("utf-8")
+    if len(encoded) <= 75:
+        return line + "\r\n"
+
+    parts = []
+    current = ""
+    limit = 75
+    for char in line:
+        if len((current + char).encode("utf-8")) > limit:
+            parts.append(current)
+            current = ""
+            limit = 74  # 이어지는 줄은 앞의 공백 1옥텟 포함
+        current += char
+    parts.append(current)
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def _ics_datetime(day: date, hhmm: str) -> str:
+    """날짜와 HH:MM을 로컬 시각 DATE-TIME으로 변환"""
+    hour, minute = hhmm.split(":")
+    return f"{day:%Y%m%d}T{int(hour):02d}{int(minute):02d}00"
+
+
+def iter_ics(schedules: Iterable, start: Optional[date] = None, calendar_name: str = "실습실 시간표") -> Iterator[bytes]:
+    """iCalendar 조각 생성 (배정마다 수업주수만큼 반복되는 주간 일정 1개)"""
+    monday = semester_monday(start)
+    stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
+    header = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        "PRODID:-//timetable//export//KO",
+        "CALSCALE:GREGORIAN",
+        f"X-WR-CALNAME:{_ics_text(calendar_name)}",
+        "X-WR-TIMEZONE:Asia/Seoul",
+    ]
+    yield "".join(_ics_line(line) for line in header).encode("utf-8")
+
+    lines: List[str] = []
+    for count, schedule in enumerate(schedules, 1):
+        if schedule.day not in DAYS:
+            continue
+        day = monday + timedelta(days=DAYS.index(schedule.day))
+        description = f"{schedule.department} / 수강인원 {schedule.enrollment}명 / {schedule.credits}학점"
+        lines.extend([
+            "BEGIN:VEVENT",
+            f"UID:{schedule.course_id}-{day:%Y%m%d}-{schedule.start_time.replace(':', '')}-{schedule.room}@timetable",
+            f"DTSTAMP:{stamp}",
+            f"DTSTART:{_ics_datetime(day, schedule.start_time)}",
+            f"DTEND:{_ics_datetime(day, schedule.end_time)}",
+            f"RRULE:FREQ=WEEKLY;COUNT={schedule.weeks or DEFAULT_WEEKS}",
+            f"SUMMARY:{_ics_text(schedule.course_name)} ({_ics_text(schedule.instructor)})",
+            f"LOCATION:{_ics_text(schedule.room)}",
+            f"DESCRIPTION:{_ics_text(description)}",
+            "END:VEVENT",
+        ])
+        if count % EXPORT_FLUSH_ROWS == 0:
+            yield "".join(_ics_line(line) for line in lines).encode("utf-8")
+            lines = []
+
+    lines.append("END:VCALENDAR")
+    yield "".join(_ics_line(line) for line in lines).encode("utf-8")
+
+
+class _ChunkWriter(io.RawIOBase):
+    """ZipFile이 쓴 바이트를 모아 두었다가 조각으로 꺼내는 비탐색(non-seekable) 스트림"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        """모인 바이트 반환 후 비우기"""
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+_XLSX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '</Types>'
+)
+_XLSX_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+_XLSX_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="시간표" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+_XLSX_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '</Relationships>'
+)
+
+
+def _xlsx_cell(value) -> str:
+    """셀 XML (문자열은 인라인 문자열, 숫자/불리언은 값)"""
+    if isinstance(value, bool):
+        return f'<c t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float)):
+        return f"<c><v>{value}</v></c>"
+    if value is None or value == "":
+        return "<c/>"
+    return f'<c t="inlineStr"><is><t>{escape(str(value))}</t></is></c>'
+
+
+def _xlsx_row(values: List) -> str:
+    """행 XML"""
+    return "<row>" + "".join(_xlsx_cell(value) for value in values) + "</row>"
+
+
+def iter_xlsx(schedules: Iterable) -> Iterator[bytes]:
+    """XLSX 조각 생성 (워크시트를 압축하면서 바로 내보내는 단일 시트 통합 문서)"""
+    stream = _ChunkWriter()
+    with zipfile.ZipFile(stream, "w", compression=zipfile.ZIP_DEFLATED) as workbook:
+        workbook.writestr("[Content_Types].xml", _XLSX_CONTENT_TYPES)
+        workbook.writestr("_rels/.rels", _XLSX_ROOT_RELS)
+        workbook.writestr("xl/workbook.xml", _XLSX_WORKBOOK)
+        workbook.writestr("xl/_rels/workbook.xml.rels", _XLSX_WORKBOOK_RELS)
+        yield stream.drain()
+
+        with workbook.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as sheet:
+            sheet.write((
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+                + _xlsx_row([header for header, _ in EXPORT_COLUMNS])
+            ).encode("utf-8"))
+
+            rows: List[str] = []
+            for count, schedule in enumerate(schedules, 1):
+                rows.append(_xlsx_row(_row_values(schedule)))
+                if count % EXPORT_FLUSH_ROWS == 0:
+                    sheet.write("".join(rows).encode("utf-8"))
+                    rows = []
+                    yield stream.drain()
+            sheet.write(("".join(rows) + "</sheetData></worksheet>").encode("utf-8"))
+    yield stream.drain()
+
+
+def iter_export(fmt: str, schedules: Iterable, start: Optional[date] = None) -> Iterator[bytes]:
+    """형식에 맞는 내보내기 조각 생성"""
+    if fmt == "csv":
+        return iter_csv(schedules)
+    if fmt == "ics":
+        return iter_ics(schedules, start)
+    if fmt == "xlsx":
+        return iter_xlsx(schedules)
+    raise ValueError(f"지원하지 않는 내보내기 형식입니다: {fmt}")
@@ -1,173 +1,258 @@
 """
 공실 분석 로직
+
+강의실 × 요일 × 시간 구간 점유 배열을 배정 목록 한 번 순회로 만들고,
+3시간 블록별 공실 여부와 활용률을 배열 연산으로 계산합니다.
+시간 축은 블록 경계와 배정 시작/종료 시각으로 나눈 구간(정시 배정이면 1시간 단위)이라 분 단위 결과와 같습니다.
+numpy는 첫 분석 시점에 가져옵니다 (앱 시작 시간 단축).
+VacancyState는 파티션의 분석 결과를 강의실·요일 칸 단위로 유지하며, 버전 델타에서 바뀐 칸만 다시 분석합니다.
 """
-from typing import List, Dict
-from models import Schedule, VacancySlot, RoomVacancy
-from scheduler import DAYS, TIME_SLOTS, time_to_minutes, minutes_to_time, get_3hour_end_time, is_time_overlap
+import threading
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Sequence, Tuple
+from models import Schedule
+from scheduler import (
+    DAYS, TIME_SLOTS, END_TIME_LIMIT, BLOCK_DURATION_MINUTES,
+    time_to_minutes, minutes_to_time, is_valid_time_slot
+)
+
+if TYPE_CHECKING:
+    import numpy as np
+
+DEFAULT_ROOMS = ["1215", "1216", "1217", "1418", "RENTAL_1"]
+DAY_START_MINUTES = time_to_minutes(TIME_SLOTS[0])
+DAY_END_MINUTES = time_to_minutes(END_TIME_LIMIT)
+
+# 분석 대상 3시간 블록 (시작/종료 분, 18:00 이전 종료)
+BLOCKS: List[Tuple[int, int]] = [
+    (time_to_minutes(slot), time_to_minutes(slot) + BLOCK_DURATION_MINUTES)
+    for slot in TIME_SLOTS if is_valid_time_slot(slot)
+]
+BLOCK_LABELS = {minutes: minutes_to_time(minutes) for block in BLOCKS for minutes in block}
+
+Cell = Tuple[str, str]  # (강의실, 요일)
+CellVacancy = Tuple[Tuple[bool, ...], int]  # (블록별 공실 여부, 사용 분 합계)
+EMPTY_CELL: CellVacancy = ((True,) * len(BLOCKS), 0)
 
 
 class VacancyAnalyzer:
-    """공실 분석기"""
+    """공실 분석기 (점유 배열 기반)"""
     
-    def __init__(self, schedules: List[Schedule]):
+    def __init__(self, schedules: List[Schedule], rooms: Optional[Sequence[str]] = None):
         self.schedules = schedules
-        self.rooms = ["1215", "1216", "1217", "1418", "RENTAL_1"]
+        self.rooms = list(rooms) if rooms is not None else list(DEFAULT_ROOMS)
     
     def analyze(self) -> Dict:
         """공실 분석 실행"""
-        vacancies = []
-        room_utilization = {}
-        
-        for room in self.rooms:
-            room_utilization[room] = {"total_slots": 0, "used_slots": 0}
-            
-            for day in DAYS:
-                # 해당 방, 해당 요일의 배정된 시간표만 필터링
-                day_schedules = [
-                    s for s in self.schedules 
-                    if s.room == room and s.day == day
-                ]
-                
-                # 전체 가능한 시간대에서 공실 찾기
-                free_slots = self._find_free_slots(day, room, day_schedules)
-                
-                if free_slots:
-                    vacancies.append({
-                        "room": room,
-                        "day": day,
-                        "freeSlots": free_slots
-                    })
-                
-                # 활용률 계산
-                total_minutes = 0
-                used_minutes = 0
-                
-                for start_time in TIME_SLOTS:
-                    end_time = get_3hour_end_time(start_time)
-                    if time_to_minutes(end_time) > time_to_minutes("18:00"):
-                        continue
-                    
-                    total_minutes += 180  # 3시간 = 180분
-                    
-                    # 해당 시간대에 배정된 수업이 있는지 확인
-                    for schedule in day_schedules:
-                        if is_time_overlap(
-                            start_time, end_time,
-                            schedule.start_time, schedule.end_time
-                        ):
-                            # 겹치는 부분만 계산
-                            overlap_minutes = self._calculate_overlap_minutes(
-                                start_time, end_time,
-                                schedule.start_time, schedule.end_time
-                            )
-                            used_minutes += overlap_minutes
-                            break
-                
-                room_utilization[room]["total_slots"] += total_minutes
-                room_utilization[room]["used_slots"] += used_minutes
-        
-        # 활용률 계산
-        utilization_by_room = {}
-        total_all = 0
-        used_all = 0
-        
-        for room in self.rooms:
-            total = room_utilization[room]["total_slots"]
-            used = room_utilization[room]["used_slots"]
-            total_all += total
-            used_all += used
-            
-            if total > 0:
-                utilization_by_room[room] = round(used / total, 2)
-            else:
-                utilization_by_room[room] = 0.0
-        
-        overall_utilization = round(used_all / total_all, 2) if total_all > 0 else 0.0
-        
-        return {
-            "vacancies": vacancies,
-            "summary": {
-                "utilizationRateByRoom": utilization_by_room,
-                "overallUtilizationRate": overall_utilization
-            }
-        }
+        return summarize_cells(self.rooms, self.analyze_cells())
     
-    def _find_free_slots(self, day: str, room: str, schedules: List[Schedule]) -> List[Dict]:
-        """공실 슬롯 찾기"""
-        # 모든 가능한 3시간 블록 생성
-        all_slots = []
-        for start_time in TIME_SLOTS:
-            end_time = get_3hour_end_time(start_time)
-            if time_to_minutes(end_time) <= time_to_minutes("18:00"):
-                all_slots.append((start_time, end_time))
-        
-        # 배정된 시간표와 겹치지 않는 슬롯 찾기
-        free_slots = []
+    def analyze_cells(self) -> Dict[Cell, CellVacancy]:
+        """강의실·요일 칸별 공실 블록 여부와 사용 분"""
+        import numpy as np
         
-        for start_time, end_time in all_slots:
-            is_free = True
-            for schedule in schedules:
-                if is_time_overlap(
-                    start_time, end_time,
-                    schedule.start_time, schedule.end_time
-                ):
-                    is_free = False
-                    break
-            
-            if is_free:
-                free_slots.append({
-                    "startTime": start_time,
-                    "endTime": end_time
-                })
-        
-        # 연속된 공실 슬롯 병합
-        merged_slots = self._merge_continuous_slots(free_slots)
-        
-        return merged_slots
+        occupancy, bounds = self._build_occupancy(np)
+        free, used = self._analyze_blocks(np, occupancy, bounds)
+        cells = {}
+        for room, room_free, room_used in zip(self.rooms, free.tolist(), used.sum(axis=2).tolist()):
+            for day, pattern, used_minutes in zip(DAYS, room_free, room_used):
+                cells[(room, day)] = (tuple(pattern), used_minutes)
+        return cells
     
-    def _merge_continuous_slots(self, slots: List[Dict]) -> List[Dict]:
-        """연속된 공실 슬롯 병합"""
-        if not slots:
-            return []
+    def _build_occupancy(self, np) -> Tuple["np.ndarray", "np.ndarray"]:
+        """
+        강의실 × 요일 × 시간 구간 점유 배열과 구간 경계(분)
         
-        # 시간순 정렬
-        sorted_slots = sorted(slots, key=lambda x: time_to_minutes(x["startTime"]))
+        값은 그 구간을 차지한 배정 중 목록상 가장 앞선 배정의 순번이고, 비어 있으면 배정 수입니다.
+        분석 대상 강의실/요일이 아닌 배정과 09:00~18:00 밖의 시간은 제외합니다.
+        """
+        room_index = {room: i for i, room in enumerate(self.rooms)}
+        day_index = {day: i for i, day in enumerate(DAYS)}
+        minutes_cache: Dict[str, int] = {}
         
-        merged = []
-        current_start = sorted_slots[0]["startTime"]
-        current_end = sorted_slots[0]["endTime"]
+        def to_minutes(value: str) -> int:
+            minutes = minutes_cache.get(value)
+            if minutes is None:
+                minutes = minutes_cache[value] = time_to_minutes(value)
+            return minutes
         
-        for slot in sorted_slots[1:]:
-            slot_start = time_to_minutes(slot["startTime"])
-            current_end_minutes = time_to_minutes(current_end)
-            
-            # 연속된 경우 (1시간 블록이므로 바로 다음 블록인지 확인)
-            if slot_start == current_end_minutes:
-                current_end = slot["endTime"]
-            else:
-                merged.append({
-                    "startTime": current_start,
-                    "endTime": current_end
-                })
-                current_start = slot["startTime"]
-                current_end = slot["endTime"]
+        # 배정 목록을 컬럼으로 변환 (대상이 아니면 -1)
+        rooms = np.array([room_index.get(s.room, -1) for s in self.schedules], dtype=np.int64)
+        days = np.array([day_index.get(s.day, -1) for s in self.schedules], dtype=np.int64)
+        starts = np.array([to_minutes(s.start_time) for s in self.schedules], dtype=np.int64)
+        ends = np.array([to_minutes(s.end_time) for s in self.schedules], dtype=np.int64)
+        np.clip(starts, DAY_START_MINUTES, DAY_END_MINUTES, out=starts)
+        np.clip(ends, DAY_START_MINUTES, DAY_END_MINUTES, out=ends)
+        valid = (rooms >= 0) & (days >= 0) & (ends > starts)
+        orders = np.flatnonzero(valid)
+        cells = rooms[valid] * len(DAYS) + days[valid]
+        starts, ends = starts[valid], ends[valid]
         
-        merged.append({
-            "startTime": current_start,
-            "endTime": current_end
-        })
-        
-        return merged
+        # 시간 구간 경계 (블록 경계 + 배정 시작/종료)
+        bounds = np.unique(np.concatenate([
+            np.array([DAY_START_MINUTES, DAY_END_MINUTES] + [m for block in BLOCKS for m in block], dtype=np.int64),
+            starts, ends
+        ]))
+        segments = len(bounds) - 1
+        empty = len(self.schedules)
+        occupancy = np.full(len(self.rooms) * len(DAYS) * segments, empty, dtype=np.int64)
+        if len(orders):
+            # 배정마다 차지한 구간 위치를 펼쳐서 한 번에 기록 (겹치면 앞선 배정 우선)
+            first_segment = np.searchsorted(bounds, starts)
+            lengths = np.searchsorted(bounds, ends) - first_segment
+            offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+            positions = np.repeat(cells * segments + first_segment, lengths) + offsets
+            np.minimum.at(occupancy, positions, np.repeat(orders, lengths))
+        return occupancy.reshape(len(self.rooms), len(DAYS), segments), bounds
     
-    def _calculate_overlap_minutes(self, start1: str, end1: str, start2: str, end2: str) -> int:
-        """두 시간 구간의 겹치는 분 계산"""
-        s1 = time_to_minutes(start1)
-        e1 = time_to_minutes(end1)
-        s2 = time_to_minutes(start2)
-        e2 = time_to_minutes(end2)
-        
-        overlap_start = max(s1, s2)
-        overlap_end = min(e1, e2)
+    def _analyze_blocks(
+        self, np, occupancy: "np.ndarray", bounds: "np.ndarray"
+    ) -> Tuple["np.ndarray", "np.ndarray"]:
+        """
+        블록별 공실 여부와 사용 분 (강의실 × 요일 × 블록)
         
-        return max(0, overlap_end - overlap_start)
+        사용 분은 블록과 겹치는 배정 중 목록상 가장 앞선 배정과 겹친 분입니다.
+        """
+        empty = len(self.schedules)
+        segment_minutes = np.diff(bounds)
+        free = np.zeros(occupancy.shape[:2] + (len(BLOCKS),), dtype=bool)
+        used = np.zeros(occupancy.shape[:2] + (len(BLOCKS),), dtype=np.int64)
+        for b, (start, end) in enumerate(BLOCKS):
+            first_segment, last_segment = np.searchsorted(bounds, [start, end])
+            window = occupancy[:, :, first_segment:last_segment]
+            first = window.min(axis=2)
+            free[:, :, b] = first == empty
+            overlap = (window == first[:, :, None]) @ segment_minutes[first_segment:last_segment]
+            used[:, :, b] = np.where(free[:, :, b], 0, overlap)
+        return free, used
 
+
+@lru_cache(maxsize=None)
+def merge_free_blocks(pattern: Tuple[bool, ...]) -> Tuple[Tuple[str, str], ...]:
+    """공실 블록 병합 (앞 블록 종료 시각에 시작하는 블록만 이어 붙임, 같은 공실 조합은 결과 재사용)"""
+    merged = []
+    current = None
+    for (start, end), is_free in zip(BLOCKS, pattern):
+        if not is_free:
+            continue
+        if current is not None and start == current[1]:
+            current[1] = end
+        else:
+            if current is not None:
+                merged.append((BLOCK_LABELS[current[0]], BLOCK_LABELS[current[1]]))
+            current = [start, end]
+    if current is not None:
+        merged.append((BLOCK_LABELS[current[0]], BLOCK_LABELS[current[1]]))
+    return tuple(merged)
+
+
+def vacancy_entry(room: str, day: str, pattern: Tuple[bool, ...]) -> Optional[Dict]:
+    """칸의 공실 슬롯 항목 (공실 블록이 없으면 None)"""
+    if not any(pattern):
+        return None
+    return {
+        "room": room,
+        "day": day,
+        "freeSlots": [{"startTime": start, "endTime": end} for start, end in merge_free_blocks(pattern)]
+    }
+
+
+def utilization_summary(used_by_room: Dict[str, int]) -> Dict:
+    """강의실별/전체 활용률 (블록별 사용 분 / 블록 전체 분)"""
+    total_per_room = len(DAYS) * len(BLOCKS) * BLOCK_DURATION_MINUTES
+    utilization_by_room = {
+        room: round(used_minutes / total_per_room, 2) if total_per_room > 0 else 0.0
+        for room, used_minutes in used_by_room.items()
+    }
+    total_all = total_per_room * len(used_by_room)
+    overall_utilization = round(sum(used_by_room.values()) / total_all, 2) if total_all > 0 else 0.0
+    return {
+        "utilizationRateByRoom": utilization_by_room,
+        "overallUtilizationRate": overall_utilization
+    }
+
+
+def summarize_cells(rooms: Sequence[str], cells: Dict[Cell, CellVacancy]) -> Dict:
+    """칸별 분석 결과를 공실 슬롯(강의실, 요일 순)과 활용률로 정리"""
+    vacancies = []
+    used_by_room = {}
+    for room in rooms:
+        used_by_room[room] = 0
+        for day in DAYS:
+            pattern, used_minutes = cells.get((room, day), EMPTY_CELL)
+            used_by_room[room] += used_minutes
+            entry = vacancy_entry(room, day, pattern)
+            if entry is not None:
+                vacancies.append(entry)
+    return {"vacancies": vacancies, "summary": utilization_summary(used_by_room)}
+
+
+class VacancyState:
+    """
+    증분 공실 분석 상태 (파티션별)
+    
+    마지막으로 저장한 버전 기준으로 강의실·요일 칸마다 공실 슬롯 항목과 사용 분, 강의실별 사용 분 합계를 보관합니다.
+    버전 저장 시 델타 기록에서 나온 변경 칸만 다시 분석하고, 변경 칸을 모르거나 상태가 부모 버전 기준이 아니면 전체를 분석합니다.
+    변경되지 않은 배정끼리의 목록 순서만 바뀐 경우(겹친 배정의 사용 분 계산 기준)는 다음 전체 분석 때 반영됩니다.
+    """
+    
+    def __init__(self, rooms: Optional[Sequence[str]] = None):
+        self.rooms = list(rooms) if rooms is not None else list(DEFAULT_ROOMS)
+        self.order: List[Cell] = [(room, day) for room in self.rooms for day in DAYS]
+        self.cell_used: Dict[Cell, int] = {}
+        self.entries: Dict[Cell, Optional[Dict]] = {
+            (room, day): vacancy_entry(room, day, EMPTY_CELL[0]) for room, day in self.order
+        }
+        self.used_by_room: Dict[str, int] = {room: 0 for room in self.rooms}
+        self.version_id: Optional[int] = None  # 상태가 반영한 버전
+        self.result: Optional[Dict] = None
+        self._lock = threading.Lock()
+    
+    def update(
+        self,
+        schedules: List[Schedule],
+        version_id: int,
+        parent_id: Optional[int] = None,
+        changed_cells: Optional[Iterable[Cell]] = None
+    ) -> Dict:
+        """version_id 버전의 배정 목록 반영 후 분석 결과 반환 (changed_cells는 parent_id 버전 대비 바뀐 칸)"""
+        with self._lock:
+            if changed_cells is None or self.version_id is None or self.version_id != parent_id:
+                touched = set(self.order)
+            else:
+                touched = set(changed_cells).intersection(self.entries)
+            if touched:
+                touched_rooms = {room for room, _ in touched}
+                analyzer = VacancyAnalyzer(
+                    [schedule for schedule in schedules if (schedule.room, schedule.day) in touched],
+                    [room for room in self.rooms if room in touched_rooms]
+                )
+                analyzed = analyzer.analyze_cells()
+                for cell in touched:
+                    pattern, used_minutes = analyzed[cell]
+                    self.entries[cell] = vacancy_entry(cell[0], cell[1], pattern)
+                    self.used_by_room[cell[0]] += used_minutes - self.cell_used.get(cell, 0)
+                    self.cell_used[cell] = used_minutes
+                self.result = None
+            self.version_id = version_id
+            if self.result is None:
+                entries = self.entries
+                self.result = {
+                    "vacancies": [entries[cell] for cell in self.order if entries[cell] is not None],
+                    "summary": utilization_summary(self.used_by_room)
+                }
+            if not schedules:
+                return analyze_schedules(schedules)
+            return self.result
+
+
+def analyze_schedules(schedules: List[Schedule]) -> Dict:
+    """시간표 공실 분석 (배정이 없으면 빈 결과)"""
+    if not schedules:
+        return {
+            "vacancies": [],
+            "summary": {
+                "utilizationRateByRoom": {},
+                "overallUtilizationRate": 0.0
+            }
+        }
+    return VacancyAnalyzer(schedules).analyze()
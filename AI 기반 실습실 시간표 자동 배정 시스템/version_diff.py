@@ -0,0 +1,147 @@
+"""
+버전 간 시간표 비교
+
+두 버전의 델타 체인(버전 -> 부모 -> ... -> 스냅샷)을 재귀 CTE로 구하고,
+한쪽 체인에만 속한 버전의 이력 행에 등장하는 과목만 비교 대상으로 삼습니다.
+과목별 최신 행은 윈도 함수(ROW_NUMBER)로 골라 한 번의 쿼리로 계산하므로
+같은 스냅샷 체인 안의 버전 비교는 시간표 크기가 아니라 변경량에 비례합니다.
+"""
+from typing import Dict, List, Optional, Tuple
+import orjson
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from models import ScheduleRecord, TimetableVersion
+from version_history import get_version_vacancy
+
+# 과목별 최신 상태 (두 버전 중 한쪽 체인에만 있는 버전에서 변경된 과목만)
+_DIFF_QUERY = text("""
+WITH RECURSIVE chain(owner, version_id, parent_id, depth) AS (
+    SELECT id, id, parent_id, COALESCE(delta_depth, 0)
+    FROM timetable_versions
+    WHERE id IN (:a, :b)
+    UNION ALL
+    SELECT chain.owner, v.id, v.parent_id, COALESCE(v.delta_depth, 0)
+    FROM timetable_versions v
+    JOIN chain ON v.id = chain.parent_id
+    WHERE chain.depth > 0
+),
+exclusive AS (
+    SELECT version_id FROM chain GROUP BY version_id HAVING COUNT(DISTINCT owner) = 1
+),
+touched AS (
+    SELECT DISTINCT h.course_id
+    FROM schedule_history h
+    JOIN exclusive e ON h.version_id = e.version_id
+),
+ranked AS (
+    SELECT
+        chain.owner, h.course_id, h.is_removed,
+        h.course_code, h.course_name, h.instructor, h.department,
+        h.day, h.start_time, h.end_time, h.room,
+        h.is_lab, h.enrollment, h.weeks, h.credits,
+        ROW_NUMBER() OVER (PARTITION BY chain.owner, h.course_id ORDER BY chain.depth DESC) AS rn
+    FROM chain
+    JOIN schedule_history h ON h.version_id = chain.version_id
+    WHERE h.course_id IN (SELECT course_id FROM touched)
+)
+SELECT * FROM ranked WHERE rn = 1
+""")
+
+SLOT_FIELDS = ("day", "start_time", "end_time", "room")
+DETAIL_FIELDS = ("course_code", "course_name", "instructor", "department", "is_lab", "enrollment", "weeks", "credits")
+
+
+def _slot_dict(record: ScheduleRecord) -> Dict:
+    """배정 위치 딕셔너리"""
+    return {"day": record.day, "startTime": record.start_time, "endTime": record.end_time, "room": record.room}
+
+
+def _course_dict(record: ScheduleRecord) -> Dict:
+    """강의 식별 정보 딕셔너리"""
+    return {
+        "courseId": record.course_id,
+        "courseCode": record.course_code,
+        "courseName": record.course_name,
+        "instructor": record.instructor
+    }
+
+
+def _changed_states(
+    db: Session, a: int, b: int
+) -> Dict[int, Tuple[Optional[ScheduleRecord], Optional[ScheduleRecord]]]:
+    """변경 가능성이 있는 과목별 (버전 a 상태, 버전 b 상태), 없으면 None"""
+    states: Dict[int, List[Optional[ScheduleRecord]]] = {}
+    for row in db.execute(_DIFF_QUERY, {"a": a, "b": b}):
+        pair = states.setdefault(row.course_id, [None, None])
+        if not row.is_removed:
+            record = ScheduleRecord(*(getattr(row, field) for field in ScheduleRecord._fields))
+            pair[0 if row.owner == a else 1] = record._replace(is_lab=bool(record.is_lab))
+    return {course_id: (pair[0], pair[1]) for course_id, pair in states.items()}
+
+
+def _utilization_change(db: Session, a: int, b: int) -> Dict:
+    """두 버전의 활용률과 변화량 (저장된 버전별 공실 분석 사용)"""
+    before = orjson.loads(get_version_vacancy(db, a))["summary"]
+    after = orjson.loads(get_version_vacancy(db, b))["summary"]
+    rooms = sorted(before["utilizationRateByRoom"].keys() | after["utilizationRateByRoom"].keys())
+    return {
+        "from": before,
+        "to": after,
+        "overallChange": round(after["overallUtilizationRate"] - before["overallUtilizationRate"], 2),
+        "changeByRoom": {
+            room: round(
+                after["utilizationRateByRoom"].get(room, 0.0) - before["utilizationRateByRoom"].get(room, 0.0), 2
+            )
+            for room in rooms
+        }
+    }
+
+
+def _version_dict(version: TimetableVersion) -> Dict:
+    """비교 대상 버전 정보"""
+    return {"id": version.id, "versionNumber": version.version_number, "description": version.description or ""}
+
+
+def diff_versions(db: Session, a: int, b: int) -> Optional[Dict]:
+    """버전 a -> b 변경 내역 (이동/추가/삭제/정보 변경 과목과 활용률 변화, 버전이 없으면 None)"""
+    version_a = db.get(TimetableVersion, a)
+    version_b = db.get(TimetableVersion, b)
+    if version_a is None or version_b is None:
+        return None
+
+    moved, added, removed, updated = [], [], [], []
+    states = _changed_states(db, a, b) if a != b else {}
+    for course_id in sorted(states):
+        before, after = states[course_id]
+        if before is None and after is None:
+            continue
+        if before is None:
+            added.append({**_course_dict(after), "to": _slot_dict(after)})
+        elif after is None:
+            removed.append({**_course_dict(before), "from": _slot_dict(before)})
+        elif any(getattr(before, field) != getattr(after, field) for field in SLOT_FIELDS):
+            moved.append({**_course_dict(after), "from": _slot_dict(before), "to": _slot_dict(after)})
+        else:
+            changes = {
+                field: [getattr(before, field), getattr(after, field)]
+                for field in DETAIL_FIELDS if getattr(before, field) != getattr(after, field)
+            }
+            if changes:
+                updated.append({**_course_dict(after), "changes": changes})
+
+    return {
+        "from": _version_dict(version_a),
+        "to": _version_dict(version_b),
+        "summary": {"moved": len(moved), "added": len(added), "removed": len(removed), "updated": len(updated)},
+        "moved": moved,
+        "added": added,
+        "removed": removed,
+        "updated": updated,
+        "utilization": _utilization_change(db, a, b)
+    }
+
+
+async def diff_versions_async(db: AsyncSession, a: int, b: int) -> Optional[Dict]:
+    """버전 a -> b 변경 내역 (비동기)"""
+    return await db.run_sync(diff_versions, a, b)
@@ -0,0 +1,328 @@
+"""
+시간표 버전 이력 저장 및 복원 (델타 인코딩)
+
+각 버전은 부모 버전 대비 변경된 배정만 ScheduleHistory에 저장하고,
+SNAPSHOT_INTERVAL 버전마다 전체 스냅샷을 저장합니다.
+버전 복원 시 가장 가까운 스냅샷부터 델타를 순서대로 적용합니다.
+버전 번호, 활성 버전, 델타 부모는 파티션(테넌트/학기)별로 관리합니다.
+조회/복원 함수는 비동기 세션용 *_async 버전을 함께 제공합니다.
+버전 저장 시 공실 분석은 파티션별 VacancyState로 직전 저장 이후 바뀐 강의실·요일 칸만 다시 계산합니다.
+"""
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set, Tuple
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from models import (
+    Partition, Schedule, ScheduleHistory, TimetableVersion, ScheduleRecord, VacancyAnalysis, VacancyResponse
+)
+from vacancy_analyzer import VacancyState, analyze_schedules
+from metrics import record_cache
+
+# 델타 인코딩 파라미터
+SNAPSHOT_INTERVAL = 20  # 전체 스냅샷 주기 (버전 수)
+RECONSTRUCTION_CACHE_SIZE = 64  # 복원 결과 캐시 크기 (버전 수)
+VACANCY_STATE_CACHE_SIZE = 64  # 증분 공실 분석 상태를 보관할 파티션 수
+
+# 두 캐시는 요청 스레드(asyncio.to_thread)에서 동시에 갱신되므로 잠금으로 보호
+_cache_lock = threading.Lock()
+
+# 버전 ID -> 복원된 배정 목록 (버전은 저장 후 변경되지 않으므로 캐시 가능)
+_reconstruction_cache: "OrderedDict[int, Tuple[ScheduleRecord, ...]]" = OrderedDict()
+
+# 파티션 -> 마지막으로 저장한 시간표의 공실 분석 상태
+_vacancy_states: "OrderedDict[Partition, VacancyState]" = OrderedDict()
+
+
+def record_from_row(row) -> ScheduleRecord:
+    """Schedule/ScheduleHistory 객체를 ScheduleRecord로 변환"""
+    return ScheduleRecord(*(getattr(row, field) for field in ScheduleRecord._fields))
+
+
+def _cache_get(version_id: int) -> Optional[Tuple[ScheduleRecord, ...]]:
+    """복원 캐시 조회"""
+    with _cache_lock:
+        records = _reconstruction_cache.get(version_id)
+        if records is not None:
+            _reconstruction_cache.move_to_end(version_id)
+    record_cache("reconstruction", records is not None)
+    return records
+
+
+def _cache_put(version_id: int, records: Tuple[ScheduleRecord, ...]) -> None:
+    """복원 캐시 저장 (LRU)"""
+    with _cache_lock:
+        _reconstruction_cache[version_id] = records
+        _reconstruction_cache.move_to_end(version_id)
+        while len(_reconstruction_cache) > RECONSTRUCTION_CACHE_SIZE:
+            _reconstruction_cache.popitem(last=False)
+
+
+def clear_reconstruction_cache() -> None:
+    """복원 캐시 비우기"""
+    with _cache_lock:
+        _reconstruction_cache.clear()
+
+
+def _vacancy_state(partition: Partition) -> VacancyState:
+    """파티션 공실 분석 상태 (LRU, 없으면 빈 상태에서 시작하여 첫 저장 때 전체 분석)"""
+    with _cache_lock:
+        state = _vacancy_states.get(partition)
+        if state is None:
+            state = _vacancy_states[partition] = VacancyState()
+        _vacancy_states.move_to_end(partition)
+        while len(_vacancy_states) > VACANCY_STATE_CACHE_SIZE:
+            _vacancy_states.popitem(last=False)
+        return state
+
+
+def _history_from_record(version_id: int, record: ScheduleRecord) -> ScheduleHistory:
+    """ScheduleRecord로부터 ScheduleHistory 객체 생성"""
+    return ScheduleHistory(version_id=version_id, is_removed=False, **record._asdict())
+
+
+def write_history_rows(
+    db: Session,
+    version_id: int,
+    records: List[ScheduleRecord],
+    parent_records: Optional[List[ScheduleRecord]] = None
+) -> Optional[Set[Tuple[str, str]]]:
+    """
+    버전 이력 행 추가 (parent_records가 없으면 전체 스냅샷, 있으면 부모 대비 변경분만 course_id 기준으로)
+
+    델타이면 변경 전후 배정이 있던 (강의실, 요일) 칸을 반환합니다 (스냅샷이면 None).
+    """
+    if parent_records is None:
+        for record in records:
+            db.add(_history_from_record(version_id, record))
+        return None
+
+    changed_cells = set()
+    parent_by_course = {r.course_id: r for r in parent_records}
+    current_by_course = {r.course_id: r for r in records}
+    for course_id, record in current_by_course.items():
+        parent_record = parent_by_course.get(course_id)
+        if parent_record != record:
+            db.add(_history_from_record(version_id, record))
+            changed_cells.add((record.room, record.day))
+            if parent_record is not None:
+                changed_cells.add((parent_record.room, parent_record.day))
+    for course_id in parent_by_course.keys() - current_by_course.keys():
+        db.add(ScheduleHistory(version_id=version_id, course_id=course_id, is_removed=True))
+        changed_cells.add((parent_by_course[course_id].room, parent_by_course[course_id].day))
+    return changed_cells
+
+
+def compute_version_metadata(records: List[ScheduleRecord], vacancy: Dict) -> Dict:
+    """버전 목록에 표시할 메타데이터 계산 (버전 저장 시 한 번만 계산)"""
+    rooms = sorted({record.room for record in records if record.room})
+    return {
+        "course_count": len(records),
+        "rooms_used": ",".join(rooms),
+        "utilization_rate": vacancy["summary"]["overallUtilizationRate"]
+    }
+
+
+def _vacancy_json(vacancy: Dict) -> str:
+    """공실 분석 결과를 응답 JSON으로 직렬화"""
+    return VacancyResponse(**vacancy).model_dump_json()
+
+
+def _latest_version(db: Session, partition: Partition) -> Optional[TimetableVersion]:
+    """파티션의 최신 버전"""
+    return db.query(TimetableVersion).filter(
+        TimetableVersion.in_partition(partition)
+    ).order_by(TimetableVersion.version_number.desc()).first()
+
+
+def get_next_version_number(db: Session, partition: Partition) -> int:
+    """파티션의 다음 버전 번호 가져오기"""
+    latest_version = _latest_version(db, partition)
+    if latest_version:
+        return latest_version.version_number + 1
+    return 1
+
+
+def get_active_version_id(db: Session, partition: Partition) -> Optional[int]:
+    """파티션의 현재 활성 버전 ID 조회 (버전이 없으면 None)"""
+    return db.query(TimetableVersion.id).filter(
+        TimetableVersion.in_partition(partition), TimetableVersion.is_active == True
+    ).scalar()
+
+
+def save_version_history(db: Session, partition: Partition, version_number: int, description: str = "") -> int:
+    """파티션의 현재 시간표를 버전 이력으로 저장 (부모 버전 대비 델타 또는 전체 스냅샷, 하나의 트랜잭션)"""
+    parent = _latest_version(db, partition)
+    schedules = db.query(Schedule).filter(Schedule.in_partition(partition)).order_by(Schedule.id).all()
+    current_records = [record_from_row(schedule) for schedule in schedules]
+
+    # 이전 활성 버전 비활성화 (새 버전과 함께 커밋되므로 저장 실패 시 활성 버전이 유지됨)
+    db.query(TimetableVersion).filter(
+        TimetableVersion.in_partition(partition), TimetableVersion.is_active == True
+    ).update({"is_active": False})
+
+    # 새 버전 생성
+    is_snapshot = parent is None or (parent.delta_depth or 0) + 1 >= SNAPSHOT_INTERVAL
+    new_version = TimetableVersion(
+        **partition._asdict(),
+        version_number=version_number,
+        description=description,
+        is_active=True,
+        parent_id=parent.id if parent else None,
+        delta_depth=0 if is_snapshot else parent.delta_depth + 1
+    )
+    db.add(new_version)
+    db.flush()
+    new_version.snapshot_id = new_version.id if is_snapshot else parent.snapshot_id
+    parent_records = None if is_snapshot else reconstruct_version(db, parent.id)
+    changed_cells = write_history_rows(db, new_version.id, current_records, parent_records)
+
+    # 공실 분석 (버전당 한 번, 부모 버전 대비 바뀐 강의실·요일 칸만 재계산)
+    vacancy = _vacancy_state(partition).update(
+        current_records, new_version.id, parent.id if parent else None, changed_cells
+    )
+    for field, value in compute_version_metadata(current_records, vacancy).items():
+        setattr(new_version, field, value)
+    db.add(VacancyAnalysis(version_id=new_version.id, result=_vacancy_json(vacancy)))
+
+    db.commit()
+    _cache_put(new_version.id, tuple(current_records))
+    return new_version.id
+
+
+def get_version_vacancy(db: Session, version_id: int) -> Optional[str]:
+    """버전별 공실 분석 결과 JSON 조회 (없으면 버전을 복원하여 계산 후 저장)"""
+    analysis = db.query(VacancyAnalysis).filter(VacancyAnalysis.version_id == version_id).first()
+    if analysis:
+        return analysis.result
+
+    records = reconstruct_version(db, version_id)
+    if records is None:
+        return None
+    result = _vacancy_json(analyze_schedules(records))
+    db.add(VacancyAnalysis(version_id=version_id, result=result))
+    db.commit()
+    return result
+
+
+def _versions_page_statement(partition: Partition, limit: int, cursor: Optional[int]):
+    """버전 목록 페이지 조회 쿼리 (limit + 1개 조회로 다음 페이지 여부 확인)"""
+    stmt = select(TimetableVersion).where(TimetableVersion.in_partition(partition))
+    if cursor is not None:
+        stmt = stmt.where(TimetableVersion.version_number < cursor)
+    return stmt.order_by(TimetableVersion.version_number.desc()).limit(limit + 1)
+
+
+def _split_versions_page(
+    versions: List[TimetableVersion], limit: int
+) -> Tuple[List[TimetableVersion], Optional[int]]:
+    """조회 결과를 페이지와 다음 커서로 분리"""
+    next_cursor = None
+    if len(versions) > limit:
+        versions = versions[:limit]
+        next_cursor = versions[-1].version_number
+    return versions, next_cursor
+
+
+def list_versions_page(
+    db: Session, partition: Partition, limit: int, cursor: Optional[int] = None
+) -> Tuple[List[TimetableVersion], Optional[int]]:
+    """파티션의 버전 목록 한 페이지 조회 (파티션/버전 번호 인덱스 기반 커서 페이지네이션)"""
+    versions = list(db.execute(_versions_page_statement(partition, limit, cursor)).scalars())
+    return _split_versions_page(versions, limit)
+
+
+def reconstruct_version(db: Session, version_id: int) -> Optional[List[ScheduleRecord]]:
+    """가장 가까운 스냅샷(또는 캐시된 버전)부터 델타를 적용하여 버전 시간표 복원"""
+    cached = _cache_get(version_id)
+    if cached is not None:
+        return list(cached)
+
+    version = db.query(TimetableVersion).filter(TimetableVersion.id == version_id).first()
+    if not version:
+        return None
+
+    # 같은 스냅샷에 속한 버전들로 부모 체인 구성
+    if version.snapshot_id is not None:
+        chain_versions = db.query(TimetableVersion).filter(
+            TimetableVersion.snapshot_id == version.snapshot_id
+        ).all()
+        versions_by_id = {v.id: v for v in chain_versions}
+    else:
+        versions_by_id = {version.id: version}
+
+    chain: List[int] = []
+    base: Tuple[ScheduleRecord, ...] = ()
+    current = version
+    while current is not None:
+        cached = _cache_get(current.id)
+        if cached is not None:
+            base = cached
+            break
+        chain.append(current.id)
+        if not current.delta_depth:
+            break
+        current = versions_by_id.get(current.parent_id)
+    chain.reverse()
+
+    # 체인의 이력 행을 한 번에 조회하여 순서대로 적용
+    rows_by_version: Dict[int, List[ScheduleHistory]] = {vid: [] for vid in chain}
+    if chain:
+        history_rows = db.query(ScheduleHistory).filter(
+            ScheduleHistory.version_id.in_(chain)
+        ).order_by(ScheduleHistory.id).all()
+        for row in history_rows:
+            rows_by_version[row.version_id].append(row)
+
+    records: Dict[int, ScheduleRecord] = {r.course_id: r for r in base}
+    for vid in chain:
+        for row in rows_by_version[vid]:
+            if row.is_removed:
+                records.pop(row.course_id, None)
+            else:
+                records[row.course_id] = record_from_row(row)
+        _cache_put(vid, tuple(records.values()))
+
+    return list(records.values())
+
+
+# 비동기 세션용 헬퍼 (동기 로직은 run_sync로 재사용)
+async def get_partition_version_async(
+    db: AsyncSession, partition: Partition, version_id: int
+) -> Optional[TimetableVersion]:
+    """파티션에 속한 버전 조회 (다른 파티션의 버전이면 None)"""
+    version = await db.get(TimetableVersion, version_id)
+    if version is None or (version.tenant, version.semester) != partition:
+        return None
+    return version
+
+
+async def get_active_version_id_async(db: AsyncSession, partition: Partition) -> Optional[int]:
+    """파티션의 현재 활성 버전 ID 조회 (비동기)"""
+    result = await db.execute(select(TimetableVersion.id).where(
+        TimetableVersion.in_partition(partition), TimetableVersion.is_active == True
+    ))
+    return result.scalar()
+
+
+async def list_versions_page_async(
+    db: AsyncSession, partition: Partition, limit: int, cursor: Optional[int] = None
+) -> Tuple[List[TimetableVersion], Optional[int]]:
+    """파티션의 버전 목록 한 페이지 조회 (비동기)"""
+    result = await db.execute(_versions_page_statement(partition, limit, cursor))
+    return _split_versions_page(list(result.scalars()), limit)
+
+
+async def reconstruct_version_async(db: AsyncSession, version_id: int) -> Optional[List[ScheduleRecord]]:
+    """버전 시간표 복원 (비동기, 캐시 적중 시 DB 접근 없음)"""
+    cached = _cache_get(version_id)
+    if cached is not None:
+        return list(cached)
+    return await db.run_sync(reconstruct_version, version_id)
+
+
+async def get_version_vacancy_async(db: AsyncSession, version_id: int) -> Optional[str]:
+    """버전별 공실 분석 결과 JSON 조회 (비동기)"""
+    return await db.run_sync(get_version_vacancy, version_id)
+
@@ -0,0 +1,227 @@
+"""
+시간표 시뮬레이션 (what-if)
+
+활성 시간표의 사본에 사용 불가 시간(강의실 대여 불가, 교수 부재, 전체 휴강)과
+추가 강의를 하드 제약으로 적용하고, 영향을 받은 강의만 다시 배정합니다.
+결과는 저장하지 않으며 변경 내역(diff)과 변경 전후 활용률을 반환합니다.
+"""
+import hashlib
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+import orjson
+from models import ScheduleRecord, UnavailableTime, WhatIfRequest
+from scheduler import (
+    DAYS, TIME_SLOTS, ALL_ROOMS, RENTAL_ROOM, END_TIME_LIMIT,
+    time_to_minutes, minutes_to_time, get_3hour_end_time
+)
+from vacancy_analyzer import analyze_schedules
+
+Interval = Tuple[int, int]  # (시작 분, 종료 분)
+
+
+def scenario_hash(request: WhatIfRequest) -> str:
+    """시나리오 해시 (사용 불가 시간은 순서 무관, 추가 강의는 배정 순서에 영향을 주므로 순서 유지)"""
+    def canonical(model) -> bytes:
+        return orjson.dumps(model.model_dump(), option=orjson.OPT_SORT_KEYS)
+
+    blocks = sorted(canonical(block) for block in request.unavailable_times)
+    extras = [canonical(course) for course in request.extra_courses]
+    return hashlib.sha256(b"\n".join(blocks) + b"\n--\n" + b"\n".join(extras)).hexdigest()
+
+
+def _parse_time(value: str) -> int:
+    """HH:MM을 분으로 변환 (형식 오류 시 ValueError)"""
+    try:
+        return time_to_minutes(value)
+    except (ValueError, AttributeError):
+        raise ValueError(f"시간 형식이 올바르지 않습니다: {value}")
+
+
+def _overlaps(a: Interval, b: Interval) -> bool:
+    """두 구간이 겹치는지 확인"""
+    return a[0] < b[1] and b[0] < a[1]
+
+
+class _Block:
+    """검증된 사용 불가 시간"""
+
+    def __init__(self, block: UnavailableTime):
+        if block.day not in DAYS:
+            raise ValueError(f"알 수 없는 요일입니다: {block.day}")
+        if block.room is not None and block.room not in ALL_ROOMS:
+            raise ValueError(f"알 수 없는 강의실입니다: {block.room}")
+        self.day = block.day
+        self.interval = (_parse_time(block.startTime), _parse_time(block.endTime))
+        if self.interval[0] >= self.interval[1]:
+            raise ValueError(f"종료 시간이 시작 시간보다 늦어야 합니다: {block.startTime}~{block.endTime}")
+        self.room = block.room
+        self.instructor = block.instructor
+
+    def applies(self, day: str, interval: Interval, room: str, instructor: str) -> bool:
+        """배정이 이 사용 불가 시간에 걸리는지 확인"""
+        if day != self.day or not _overlaps(interval, self.interval):
+            return False
+        if self.room is not None and self.room != room:
+            return False
+        if self.instructor is not None and self.instructor != instructor:
+            return False
+        return True
+
+
+class _Occupancy:
+    """강의실/교수별 사용 중인 시간 구간"""
+
+    def __init__(self, blocks: List[_Block]):
+        self.blocks = blocks
+        self.rooms: Dict[Tuple[str, str], List[Interval]] = defaultdict(list)
+        self.instructors: Dict[Tuple[str, str], List[Interval]] = defaultdict(list)
+
+    def is_blocked(self, day: str, interval: Interval, room: str, instructor: str) -> bool:
+        """사용 불가 시간에 걸리는지 확인"""
+        return any(block.applies(day, interval, room, instructor) for block in self.blocks)
+
+    def is_free(self, day: str, interval: Interval, room: str, instructor: str) -> bool:
+        """강의실/교수 충돌과 사용 불가 시간이 모두 없는지 확인"""
+        if any(_overlaps(interval, used) for used in self.rooms[(room, day)]):
+            return False
+        if any(_overlaps(interval, used) for used in self.instructors[(instructor, day)]):
+            return False
+        return not self.is_blocked(day, interval, room, instructor)
+
+    def occupy(self, day: str, interval: Interval, room: str, instructor: str) -> None:
+        """구간 사용 처리"""
+        self.rooms[(room, day)].append(interval)
+        self.instructors[(instructor, day)].append(interval)
+
+
+def _record_interval(record: ScheduleRecord) -> Interval:
+    """배정의 시간 구간"""
+    return time_to_minutes(record.start_time), time_to_minutes(record.end_time)
+
+
+def _candidate_slots(record: ScheduleRecord, original: Optional[ScheduleRecord]):
+    """
+    재배정 후보 (요일, 시작 분, 강의실)를 선호 순서로 생성
+
+    기존 배정이 있으면 같은 요일, 가까운 시간, 같은 강의실 순으로 최소한만 옮기고,
+    임대 강의실은 마지막에 시도합니다.
+    """
+    start, end = _record_interval(record)
+    duration = end - start
+    limit = time_to_minutes(END_TIME_LIMIT)
+    starts = [time_to_minutes(slot) for slot in TIME_SLOTS if time_to_minutes(slot) + duration <= limit]
+
+    candidates = [(day, slot, room) for day in DAYS for slot in starts for room in ALL_ROOMS]
+    if original is None:
+        candidates.sort(key=lambda c: (c[2] == RENTAL_ROOM, DAYS.index(c[0]), c[1]))
+    else:
+        candidates.sort(key=lambda c: (
+            c[0] != original.day,
+            abs(c[1] - start),
+            c[2] == RENTAL_ROOM and original.room != RENTAL_ROOM,
+            c[2] != original.room,
+            DAYS.index(c[0])
+        ))
+    for day, slot, room in candidates:
+        yield day, (slot, slot + duration), room
+
+
+def _slot_dict(record: ScheduleRecord) -> Dict:
+    """배정 위치 딕셔너리"""
+    return {"day": record.day, "startTime": record.start_time, "endTime": record.end_time, "room": record.room}
+
+
+def _course_dict(record: ScheduleRecord) -> Dict:
+    """강의 식별 정보 딕셔너리"""
+    return {
+        "courseId": record.course_id if record.course_id > 0 else None,
+        "courseCode": record.course_code,
+        "courseName": record.course_name,
+        "instructor": record.instructor
+    }
+
+
+def _extra_course_records(request: WhatIfRequest) -> List[ScheduleRecord]:
+    """추가 강의를 미배정 레코드로 변환 (임시 음수 ID, 3시간 블록)"""
+    records = []
+    for i, course in enumerate(request.extra_courses, 1):
+        records.append(ScheduleRecord(
+            course_id=-i,
+            course_code=course.course_code,
+            course_name=course.course_name,
+            instructor=course.instructor,
+            department=course.department,
+            day="",
+            start_time=TIME_SLOTS[0],
+            end_time=get_3hour_end_time(TIME_SLOTS[0]),
+            room="",
+            is_lab=course.is_lab,
+            enrollment=course.enrollment,
+            weeks=course.weeks,
+            credits=course.credits
+        ))
+    return records
+
+
+def simulate(records: List[ScheduleRecord], request: WhatIfRequest) -> Dict:
+    """
+    시뮬레이션 실행 (records는 활성 시간표, 변경하지 않음)
+
+    사용 불가 시간에 걸린 배정만 빼낸 뒤 남은 배정을 고정한 채로
+    빠진 강의와 추가 강의를 충돌 없는 가장 가까운 자리에 다시 배정합니다.
+    """
+    occupancy = _Occupancy([_Block(block) for block in request.unavailable_times])
+
+    kept: List[ScheduleRecord] = []
+    displaced: List[ScheduleRecord] = []
+    for record in records:
+        interval = _record_interval(record)
+        if occupancy.is_blocked(record.day, interval, record.room, record.instructor):
+            displaced.append(record)
+        else:
+            kept.append(record)
+            occupancy.occupy(record.day, interval, record.room, record.instructor)
+
+    moved, added, unplaced = [], [], []
+    placed: List[ScheduleRecord] = []
+    pending = [(record, record) for record in displaced]
+    pending += [(record, None) for record in _extra_course_records(request)]
+    for record, original in pending:
+        for day, interval, room in _candidate_slots(record, original):
+            if occupancy.is_free(day, interval, room, record.instructor):
+                occupancy.occupy(day, interval, room, record.instructor)
+                new_record = record._replace(
+                    day=day,
+                    start_time=minutes_to_time(interval[0]),
+                    end_time=minutes_to_time(interval[1]),
+                    room=room
+                )
+                placed.append(new_record)
+                if original is None:
+                    added.append({**_course_dict(new_record), "to": _slot_dict(new_record)})
+                else:
+                    moved.append({**_course_dict(record), "from": _slot_dict(record), "to": _slot_dict(new_record)})
+                break
+        else:
+            unplaced.append({
+                **_course_dict(record),
+                "from": _slot_dict(original) if original is not None else None,
+                "reason": "배정 가능한 시간/강의실이 없습니다."
+            })
+
+    before = analyze_schedules(records)["summary"]
+    after = analyze_schedules(kept + placed)["summary"]
+    return {
+        "scenarioHash": scenario_hash(request),
+        "summary": {
+            "unchanged": len(kept),
+            "displaced": len(displaced),
+            "moved": len(moved),
+            "added": len(added),
+            "unplaced": len(unplaced)
+        },
+        "moved": moved,
+        "added": added,
+        "unplaced": unplaced,
+        "utilization": {"before": before, "after": after}
+    }